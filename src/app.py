@@ -5,33 +5,64 @@ import tempfile
 import uuid
 from pathlib import Path
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from collections import deque
 import time
 from threading import Lock
+import orjson
 from src.shared.upload_video.upload_video import (
     accept_video_file,
     save_video_temp,
-    extract_frames,
+    iter_video_frames,
     save_frames_as_video
 )
+from src.shared.upload_video.video_validation import (
+    fps_from_metadata,
+    validate_fps,
+    validate_video_duration,
+    validate_file_headers,
+    validate_video_file
+)
 from src.shared.pose_estimation.pose_estimation import (
-    process_frames_with_pose,
-    draw_landmarks_on_frames
+    process_video_streaming_pose,
+    iter_annotated_frames
+)
+from src.shared.visualization.per_frame_status import calculate_per_frame_status, smooth_per_frame_status
+from src.exercise_1.calculation.calculation import calculate_squat_form, detect_camera_angle, landmarks_to_array
+from src.exercise_1.calculation.landmark_validation import get_squat_required_landmarks
+from src.exercise_1.llm_form_analysis.llm_form_analysis import (
+    analyze_torso_angle, analyze_quad_angle, analyze_ankle_angle, analyze_asymmetry,
+    analyze_rep_consistency, analyze_glute_dominance, analyze_knee_valgus, _is_front_view,
+    calculate_final_score, detect_squat_phases
 )
-from src.exercise_1.calculation.calculation import calculate_squat_form
 
+EXERCISE_NAMES = {1: "Squat", 2: "Bench", 3: "Deadlift"}
+VISUALIZATION_LANDMARK_INDICES = (0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 29, 30, 31, 32)
+MAX_FILE_SIZE = 500 * 1024 * 1024
+# Opt-in: uploads whose decoded frames (probe width x height x 3 x frame count) fit in this size keep them
+# from the pose pass so visualization skips a second decode. The budget applies per in-flight upload in
+# every worker. Default 0 always re-decodes, keeping per-request memory at one frame.
+VISUALIZATION_FRAME_CACHE_BYTES = int(os.environ.get("VISUALIZATION_FRAME_CACHE_MB", "0")) * 1024 * 1024
 RATE_LIMIT_WINDOW_SECONDS = 60
 RATE_LIMIT_MAX_REQUESTS = 5
 _upload_rate_limit_store = {}
 _upload_rate_limit_lock = Lock()
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; much faster on the large per-frame float lists in analysis results."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
 app = FastAPI(
     title="Reform Service",
     description="Exercise form analysis service using LLM and Computer Vision",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 OUTPUTS_DIR = Path("outputs")
@@ -63,7 +94,6 @@ def get_required_landmarks(exercise: int) -> list:
     Returns list of required landmark indices or None if not applicable.
     """
     if exercise == 1:
-        from src.exercise_1.calculation.landmark_validation import get_squat_required_landmarks
         return get_squat_required_landmarks()
     elif exercise == 2:
         # TODO: Add bench required landmarks when implemented
@@ -75,16 +105,14 @@ def get_required_landmarks(exercise: int) -> list:
         return None
 
 
-def route_to_exercise_calculation(exercise: int, landmarks_list: list, validation_result: dict = None) -> dict:
+def route_to_exercise_calculation(exercise: int, landmarks_list: list, validation_result: dict = None,
+                                  landmarks_xy: tuple = None) -> dict:
     """Routes to appropriate exercise calculation module."""
-    if exercise == 1:
-        return calculate_squat_form(landmarks_list, validation_result)
-    elif exercise == 2:
-        return {"exercise": 2, "message": "Exercise 2 not implemented"}
-    elif exercise == 3:
-        return {"exercise": 3, "message": "Exercise 3 not implemented"}
-    else:
+    if exercise not in EXERCISE_NAMES:
         raise ValueError(f"Invalid exercise: {exercise}")
+    if exercise == 1:
+        return calculate_squat_form(landmarks_list, validation_result, landmarks_xy)
+    return {"exercise": exercise, "message": f"Exercise {exercise} not implemented"}
 
 
 def validate_exercise_type(exercise: int) -> tuple:
@@ -93,7 +121,7 @@ def validate_exercise_type(exercise: int) -> tuple:
     Usable by both upload and livestream.
     Returns tuple of (is_valid: bool, error_message: str).
     """
-    if exercise not in [1, 2, 3]:
+    if exercise not in EXERCISE_NAMES:
         return False, f"Invalid exercise type: {exercise}. Must be 1 (Squat), 2 (Bench), or 3 (Deadlift)"
     return True, None
 
@@ -117,7 +145,6 @@ async def _validate_file(video: UploadFile, file_size: int = None) -> tuple:
     if file_size == 0:
         raise HTTPException(status_code=400, detail="Empty file received")
     
-    MAX_FILE_SIZE = 500 * 1024 * 1024
     if file_size > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail=f"File too large: {file_size} bytes. Maximum: {MAX_FILE_SIZE} bytes")
     
@@ -127,12 +154,19 @@ async def _validate_file(video: UploadFile, file_size: int = None) -> tuple:
     return file_info, file_size
 
 
+def _get_upload_size(video: UploadFile) -> int:
+    """Measures upload size by seeking the spooled upload file, without reading its contents."""
+    video.file.seek(0, os.SEEK_END)
+    file_size = video.file.tell()
+    video.file.seek(0)
+    return file_size
+
+
 def check_camera_angle(landmarks_list: list) -> dict:
     """
     General camera angle checker - returns camera angle info without raising exceptions.
     Usable by both upload and livestream. Check 'should_reject' flag to handle rejection.
     """
-    from src.exercise_1.calculation.calculation import detect_camera_angle
     return detect_camera_angle(landmarks_list)
 
 
@@ -158,23 +192,22 @@ def _extract_active_angles(angles: list, squat_phases: dict) -> list:
         return angles
     active_angles = []
     for rep in squat_phases["reps"]:
-        active_angles.extend([angles[i] if i < len(angles) else None
-                             for i in range(rep["start_frame"], rep["end_frame"] + 1)])
+        start, end = rep["start_frame"], rep["end_frame"] + 1
+        rep_angles = angles[start:end]
+        active_angles.extend(rep_angles)
+        active_angles.extend([None] * (end - start - len(rep_angles)))
     return active_angles
 
 
 def _perform_angle_analyses(calculation_results: dict, quad_angles: list, ankle_angles: list,
                            squat_phases: dict, torso_asymmetry: list, quad_asymmetry: list,
                            ankle_asymmetry: list, fps: float, camera_angle_info: dict = None,
-                           landmarks_list: list = None, validation_result: dict = None) -> dict:
+                           landmarks_list: list = None, validation_result: dict = None,
+                           landmarks_xy: tuple = None) -> dict:
     """Performs all angle analyses and returns form_analysis dict."""
-    from src.exercise_1.llm_form_analysis.llm_form_analysis import (
-        analyze_torso_angle, analyze_quad_angle, analyze_ankle_angle, analyze_asymmetry,
-        analyze_rep_consistency, analyze_glute_dominance, analyze_knee_valgus, _is_front_view
-    )
     quad_angles_raw = calculation_results["angles_per_frame"].get("quad_angle", [])
     torso_angles_raw = calculation_results["angles_per_frame"].get("torso_angle", [])
-    torso_analysis = analyze_torso_angle(torso_angles_raw, quad_angles_raw, validation_result)
+    torso_analysis = analyze_torso_angle(torso_angles_raw, quad_angles_raw, validation_result, squat_phases.get("reps", []))
     quad_analysis = analyze_quad_angle(quad_angles)
     ankle_analysis = analyze_ankle_angle(ankle_angles)
     torso_asymmetry_analysis = analyze_asymmetry(torso_asymmetry, "torso")
@@ -189,7 +222,7 @@ def _perform_angle_analyses(calculation_results: dict, quad_angles: list, ankle_
     ) if squat_phases and squat_phases.get("reps") else None
     knee_valgus = None
     if _is_front_view(camera_angle_info) and landmarks_list and squat_phases and squat_phases.get("reps"):
-        knee_valgus = analyze_knee_valgus(landmarks_list, squat_phases.get("reps", []))
+        knee_valgus = analyze_knee_valgus(landmarks_list, squat_phases.get("reps", []), landmarks_xy)
     result = {
         "torso_angle": torso_analysis, "quad_angle": quad_analysis, "ankle_angle": ankle_analysis,
         "torso_asymmetry": torso_asymmetry_analysis, "quad_asymmetry": quad_asymmetry_analysis,
@@ -201,7 +234,6 @@ def _perform_angle_analyses(calculation_results: dict, quad_angles: list, ankle_
         result["glute_dominance"] = glute_dominance
     if knee_valgus and knee_valgus.get("status") != "error":
         result["knee_valgus"] = knee_valgus
-    from src.exercise_1.llm_form_analysis.llm_form_analysis import calculate_final_score
     result["final_score"] = calculate_final_score(result)
     return result
 
@@ -221,12 +253,12 @@ def _extract_all_active_data(calculation_results: dict, squat_phases: dict) -> t
 
 
 def _analyze_exercise_form(exercise: int, calculation_results: dict, fps: float,
-                          camera_angle_info: dict = None, landmarks_list: list = None, validation_result: dict = None) -> tuple:
+                          camera_angle_info: dict = None, landmarks_list: list = None, validation_result: dict = None,
+                          landmarks_xy: tuple = None) -> tuple:
     """Analyzes exercise form and returns form_analysis and squat_phases."""
     form_analysis = None
     squat_phases = None
     if exercise == 1 and calculation_results.get("angles_per_frame"):
-        from src.exercise_1.llm_form_analysis.llm_form_analysis import detect_squat_phases
         quad_angles_raw = calculation_results["angles_per_frame"].get("quad_angle", [])
         squat_phases = detect_squat_phases(quad_angles_raw, fps)
         quad_angles, ankle_angles, torso_asymmetry, quad_asymmetry, ankle_asymmetry = _extract_all_active_data(
@@ -234,24 +266,26 @@ def _analyze_exercise_form(exercise: int, calculation_results: dict, fps: float,
         )
         form_analysis = _perform_angle_analyses(
             calculation_results, quad_angles, ankle_angles, squat_phases,
-            torso_asymmetry, quad_asymmetry, ankle_asymmetry, fps, camera_angle_info, landmarks_list, validation_result
+            torso_asymmetry, quad_asymmetry, ankle_asymmetry, fps, camera_angle_info, landmarks_list, validation_result,
+            landmarks_xy
         )
     return form_analysis, squat_phases
 
 
-def process_analysis_pipeline(exercise: int, frames: list, fps: float, landmarks_list: list, validation_result: dict = None) -> tuple:
-    """Core analysis pipeline - processes frames and returns analysis results. General function usable by both upload and livestream."""
+def process_analysis_pipeline(exercise: int, fps: float, landmarks_list: list, validation_result: dict = None) -> tuple:
+    """Core analysis pipeline - processes landmarks and returns analysis results. General function usable by both upload and livestream."""
     camera_angle_info = check_camera_angle(landmarks_list)
-    calculation_results = route_to_exercise_calculation(exercise, landmarks_list, validation_result)
+    landmarks_xy = landmarks_to_array(landmarks_list) if exercise == 1 else None
+    calculation_results = route_to_exercise_calculation(exercise, landmarks_list, validation_result, landmarks_xy)
     form_analysis, squat_phases = _analyze_exercise_form(
-        exercise, calculation_results, fps, camera_angle_info, landmarks_list, validation_result
+        exercise, calculation_results, fps, camera_angle_info, landmarks_list, validation_result, landmarks_xy
     )
     return calculation_results, camera_angle_info, form_analysis, squat_phases
 
 
-def _process_video_analysis(video: UploadFile, exercise: int, frames: list, fps: float, landmarks_list: list, validation_result: dict = None) -> tuple:
+def _process_video_analysis(video: UploadFile, exercise: int, fps: float, landmarks_list: list, validation_result: dict = None) -> tuple:
     """Upload-specific wrapper for process_analysis_pipeline. Handles camera angle rejection for upload. Maintains backward compatibility."""
-    calc_results, cam_info, form_analysis, squat_phases = process_analysis_pipeline(exercise, frames, fps, landmarks_list, validation_result)
+    calc_results, cam_info, form_analysis, squat_phases = process_analysis_pipeline(exercise, fps, landmarks_list, validation_result)
     if cam_info.get("should_reject", False):
         raise HTTPException(
             status_code=400,
@@ -268,11 +302,10 @@ def _process_video_analysis(video: UploadFile, exercise: int, frames: list, fps:
 def build_analysis_response(exercise: int, frame_count: int, calculation_results: dict, camera_angle_info: dict,
                             form_analysis: dict, squat_phases: dict) -> dict:
     """Builds general analysis response dictionary. Usable by both upload and livestream."""
-    exercise_names = {1: "Squat", 2: "Bench", 3: "Deadlift"}
     return {
         "status": "success",
         "exercise": exercise,
-        "exercise_name": exercise_names[exercise],
+        "exercise_name": EXERCISE_NAMES[exercise],
         "frame_count": frame_count,
         "calculation_results": calculation_results,
         "camera_angle_info": camera_angle_info,
@@ -282,12 +315,12 @@ def build_analysis_response(exercise: int, frame_count: int, calculation_results
     }
 
 
-def _build_response(exercise: int, file_info: dict, file_size: int, frames: list, output_path: Path,
+def _build_response(exercise: int, file_info: dict, file_size: int, frame_count: int, output_path: Path,
                    output_filename: str, calculation_results: dict, camera_angle_info: dict,
                    form_analysis: dict, squat_phases: dict) -> dict:
     """Upload-specific response builder. Adds upload metadata to general analysis response."""
     analysis_response = build_analysis_response(
-        exercise, len(frames), calculation_results, camera_angle_info, form_analysis, squat_phases
+        exercise, frame_count, calculation_results, camera_angle_info, form_analysis, squat_phases
     )
     analysis_response.update({
         "message": "Video processed successfully",
@@ -303,29 +336,27 @@ def _build_response(exercise: int, file_info: dict, file_size: int, frames: list
 
 def create_visualization(frames: list, landmarks_list: list, fps: float, 
                         calculation_results: dict = None, form_analysis: dict = None,
-                        output_dir: Path = None, output_filename: str = None) -> tuple:
+                        output_dir: Path = None, output_filename: str = None, copy_frames: bool = True) -> tuple:
     """
     Creates visualization video with configurable output location. 
     General function usable by both upload and livestream.
     
     Args:
-        frames: List of video frames
+        frames: List or iterable of video frames (annotated and written one at a time)
         landmarks_list: List of MediaPipe pose landmarks
         fps: Frames per second
         calculation_results: Optional dict with angles_per_frame and asymmetry_per_frame
         form_analysis: Optional dict with form analysis results (for glute_dominance status)
         output_dir: Optional output directory (defaults to OUTPUTS_DIR)
         output_filename: Optional output filename (defaults to UUID)
+        copy_frames: Set False to draw in place when frames are disposable decode buffers
     
     Returns:
         Tuple of (output_path, output_filename)
     """
-    landmark_indices = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 29, 30, 31, 32]
-    
     # Calculate per-frame status if data is available
     per_frame_status = None
     if calculation_results and form_analysis:
-        from src.shared.visualization.per_frame_status import calculate_per_frame_status
         glute_dominance_status = None
         if form_analysis.get("glute_dominance"):
             glute_dominance_status = form_analysis["glute_dominance"].get("status")
@@ -337,10 +368,11 @@ def create_visualization(frames: list, landmarks_list: list, fps: float,
         )
         
         # Apply temporal smoothing to reduce flickering (0.2s window)
-        from src.shared.visualization.per_frame_status import smooth_per_frame_status
         per_frame_status = smooth_per_frame_status(per_frame_status, fps, window_duration_seconds=0.2)
     
-    annotated_frames = draw_landmarks_on_frames(frames, landmarks_list, landmark_indices, per_frame_status, fps)
+    annotated_frames = iter_annotated_frames(
+        frames, landmarks_list, VISUALIZATION_LANDMARK_INDICES, per_frame_status, copy_frames
+    )
     
     if output_dir is None:
         output_dir = OUTPUTS_DIR
@@ -352,24 +384,47 @@ def create_visualization(frames: list, landmarks_list: list, fps: float,
     return str(output_path), output_filename
 
 
-def _create_visualization(frames: list, landmarks_list: list, fps: float, 
-                         calculation_results: dict = None, form_analysis: dict = None) -> tuple:
+def create_visualization_streaming(video_path: str, landmarks_list: list, fps: float,
+                                   calculation_results: dict = None, form_analysis: dict = None,
+                                   output_dir: Path = None, output_filename: str = None) -> tuple:
     """
-    Upload-specific wrapper for create_visualization. 
+    Creates visualization video by re-decoding video_path frame by frame.
+    Frames are decoded into one reused buffer, annotated in place and written immediately,
+    so no frame list or per-frame copy is held in memory.
+    
+    Returns:
+        Tuple of (output_path, output_filename)
+    """
+    return create_visualization(
+        iter_video_frames(video_path, reuse_buffer=True), landmarks_list, fps, calculation_results, form_analysis,
+        output_dir, output_filename, copy_frames=False
+    )
+
+
+def _create_visualization(video_path: str, landmarks_list: list, fps: float, 
+                         calculation_results: dict = None, form_analysis: dict = None, frames: list = None) -> tuple:
+    """
+    Upload-specific wrapper for create_visualization_streaming. 
     Uses default OUTPUTS_DIR. Maintains backward compatibility.
+    Annotates frames in place when the pose pass kept them, otherwise re-decodes video_path.
     
     Args:
-        frames: List of video frames
+        video_path: Path to the uploaded video file
         landmarks_list: List of MediaPipe pose landmarks
         fps: Frames per second
         calculation_results: Optional dict with angles_per_frame and asymmetry_per_frame
         form_analysis: Optional dict with form analysis results
+        frames: Optional decoded frames retained from the pose pass
     
     Returns:
         Tuple of (output_path, output_filename)
     """
-    output_path, output_filename = create_visualization(
-        frames, landmarks_list, fps, calculation_results, form_analysis, OUTPUTS_DIR, None
+    if frames is not None:
+        return create_visualization(
+            frames, landmarks_list, fps, calculation_results, form_analysis, OUTPUTS_DIR, None, copy_frames=False
+        )
+    output_path, output_filename = create_visualization_streaming(
+        video_path, landmarks_list, fps, calculation_results, form_analysis, OUTPUTS_DIR, None
     )
     return output_path, output_filename
 
@@ -397,31 +452,8 @@ def _get_client_ip(request: Request) -> str:
     return "unknown"
 
 
-def validate_video_data(frames: list, fps: float, landmarks_list: list, validation_result: dict, exercise: int, 
-                       skip_file_validations: bool = False) -> dict:
-    """
-    General validation orchestrator - validates frames, fps, duration, and landmarks.
-    Usable by both upload and livestream (livestream can skip file validations).
-    Returns dict with validation results or raises HTTPException on failure.
-    """
-    validation_results = {"all_valid": True, "errors": []}
-    
-    # Frame validation (if frames were extracted with validation)
-    if frames:
-        frame_count = len(frames)
-        if frame_count == 0:
-            raise HTTPException(status_code=400, detail={
-                "error": "frame_extraction_failed",
-                "message": "No frames extracted from video",
-                "frame_count": 0,
-                "valid_frame_count": 0,
-                "recommendation": "Please try re-exporting the video"
-            })
-    else:
-        frame_count = 0
-    
-    # FPS validation
-    from src.shared.upload_video.video_validation import validate_fps
+def _check_fps(fps: float) -> None:
+    """Raises HTTPException when the FPS is unusable for analysis."""
     fps_validation = validate_fps(fps)
     if not fps_validation.get("is_valid", True):
         raise HTTPException(status_code=400, detail={
@@ -431,22 +463,24 @@ def validate_video_data(frames: list, fps: float, landmarks_list: list, validati
             "warnings": fps_validation.get("warnings", []),
             "recommendation": fps_validation.get("recommendation", "Please use a video with valid FPS metadata")
         })
-    
-    # Duration validation (only if frames available)
-    if not skip_file_validations and frame_count > 0:
-        from src.shared.upload_video.video_validation import validate_video_duration
-        duration_validation = validate_video_duration(frame_count, fps, max_duration_seconds=120.0)
-        if not duration_validation.get("is_valid", True):
-            raise HTTPException(status_code=400, detail={
-                "error": "video_duration_exceeded",
-                "message": duration_validation.get("errors", ["Video duration validation failed"])[0],
-                "duration_seconds": duration_validation.get("duration_seconds", 0),
-                "frame_count": duration_validation.get("frame_count", 0),
-                "fps": duration_validation.get("fps", 0),
-                "recommendation": duration_validation.get("recommendation", "Please select a video shorter than 120 seconds")
-            })
-    
-    # Landmark validation
+
+
+def _check_duration(frame_count: int, fps: float) -> None:
+    """Raises HTTPException when the video is longer than the 120 second limit."""
+    duration_validation = validate_video_duration(frame_count, fps, max_duration_seconds=120.0)
+    if not duration_validation.get("is_valid", True):
+        raise HTTPException(status_code=400, detail={
+            "error": "video_duration_exceeded",
+            "message": duration_validation.get("errors", ["Video duration validation failed"])[0],
+            "duration_seconds": duration_validation.get("duration_seconds", 0),
+            "frame_count": duration_validation.get("frame_count", 0),
+            "fps": duration_validation.get("fps", 0),
+            "recommendation": duration_validation.get("recommendation", "Please select a video shorter than 120 seconds")
+        })
+
+
+def _check_landmark_validation(validation_result: dict) -> None:
+    """Raises HTTPException when too few frames have a valid pose."""
     if validation_result and not validation_result.get("overall_valid", True):
         raise HTTPException(status_code=400, detail={
             "error": "insufficient_pose_detection",
@@ -454,18 +488,32 @@ def validate_video_data(frames: list, fps: float, landmarks_list: list, validati
             "valid_frame_percentage": validation_result.get("valid_frame_percentage", 0.0),
             "recommendation": validation_result.get("recommendation", "Ensure person is fully visible")
         })
-    
-    validation_results["all_valid"] = True
-    return validation_results
 
 
-async def validate_uploaded_file(temp_path: str, video: UploadFile, file_size: int) -> dict:
+def validate_video_data(frame_count: int, fps: float, landmarks_list: list, validation_result: dict, exercise: int, 
+                       skip_file_validations: bool = False) -> dict:
+    """
+    General validation orchestrator - validates frames, fps, duration, and landmarks.
+    Usable by both upload and livestream (livestream can skip file validations).
+    Returns dict with validation results or raises HTTPException on failure.
+    """
+    frame_count = frame_count or 0
+    _check_fps(fps)
+    # Duration validation (only if frames available)
+    if not skip_file_validations and frame_count > 0:
+        _check_duration(frame_count, fps)
+    _check_landmark_validation(validation_result)
+    return {"all_valid": True, "errors": []}
+
+
+async def validate_uploaded_file(temp_path: str, file_info: dict) -> tuple:
     """
-    Upload-specific file validation - validates file headers, content, and format.
-    Returns file_info dict or raises HTTPException on failure.
+    Upload-specific file validation - validates file headers, content, format, FPS and duration.
+    Content and format are checked on one VideoCapture, whose FPS and frame count metadata are reused.
+    file_info comes from the _validate_file call made before the upload was saved.
+    Returns tuple of (file_info, fps, decoded_bytes), where decoded_bytes estimates the size of all
+    decoded BGR frames, or raises HTTPException on failure.
     """
-    file_info, _ = await _validate_file(video, file_size)
-    from src.shared.upload_video.video_validation import validate_file_headers, validate_video_format
     header_validation = validate_file_headers(temp_path)
     if not header_validation.get("is_valid", False):
         if os.path.exists(temp_path):
@@ -476,8 +524,7 @@ async def validate_uploaded_file(temp_path: str, video: UploadFile, file_size: i
             "detected_format": header_validation.get("detected_format", None),
             "recommendation": header_validation.get("recommendation", "Please upload a valid video file")
         })
-    from src.shared.upload_video.video_validation import validate_file_content
-    content_validation = validate_file_content(temp_path)
+    content_validation, format_validation = await run_in_threadpool(validate_video_file, temp_path)
     if not content_validation.get("is_valid", False):
         if os.path.exists(temp_path):
             os.unlink(temp_path)
@@ -489,7 +536,6 @@ async def validate_uploaded_file(temp_path: str, video: UploadFile, file_size: i
             "frame_count": content_validation.get("frame_count", 0),
             "recommendation": content_validation.get("recommendation", "Please upload a valid video file")
         })
-    format_validation = validate_video_format(temp_path)
     if not format_validation.get("is_valid", False):
         if os.path.exists(temp_path):
             os.unlink(temp_path)
@@ -499,21 +545,29 @@ async def validate_uploaded_file(temp_path: str, video: UploadFile, file_size: i
             "codec": format_validation.get("codec", "unknown"),
             "recommendation": format_validation.get("recommendation", "Please convert to MP4 (H.264) format")
         })
-    return file_info
+    fps, _ = fps_from_metadata(content_validation["fps"])
+    # FPS and duration come from the probe, so bad or over-long clips are rejected before any decode or pose work
+    try:
+        _check_fps(fps)
+        _check_duration(content_validation["frame_count"], fps)
+    except HTTPException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    decoded_bytes = content_validation["width"] * content_validation["height"] * 3 * content_validation["frame_count"]
+    return file_info, fps, decoded_bytes
 
 
 def _check_rate_limit(client_ip: str) -> None:
-    """Enforces simple IP-based rate limiting for uploads."""
+    """Enforces simple IP-based rate limiting for uploads.
+    Each IP keeps a ring buffer (bounded deque) of its last RATE_LIMIT_MAX_REQUESTS accepted upload times;
+    a new upload is rejected while the oldest of those is still inside the window."""
     now = time.time()
     with _upload_rate_limit_lock:
-        request_times = _upload_rate_limit_store.setdefault(client_ip, deque())
-        # Remove timestamps outside the window
-        while request_times and request_times[0] <= now - RATE_LIMIT_WINDOW_SECONDS:
-            request_times.popleft()
-        if not request_times:
-            _upload_rate_limit_store.pop(client_ip, None)
-            request_times = _upload_rate_limit_store.setdefault(client_ip, deque())
-        if len(request_times) >= RATE_LIMIT_MAX_REQUESTS:
+        request_times = _upload_rate_limit_store.get(client_ip)
+        if request_times is None:
+            request_times = _upload_rate_limit_store[client_ip] = deque(maxlen=RATE_LIMIT_MAX_REQUESTS)
+        if len(request_times) == RATE_LIMIT_MAX_REQUESTS and request_times[0] > now - RATE_LIMIT_WINDOW_SECONDS:
             retry_after = int(request_times[0] + RATE_LIMIT_WINDOW_SECONDS - now) + 1
             raise HTTPException(
                 status_code=429,
@@ -524,9 +578,49 @@ def _check_rate_limit(client_ip: str) -> None:
                 }
             )
         request_times.append(now)
-        # Prevent unbounded growth
-        if not request_times:
-            del _upload_rate_limit_store[client_ip]
+
+
+def _extract_upload_landmarks(temp_path: str, exercise: int, decoded_bytes: int) -> tuple:
+    """
+    Streams the uploaded video through pose estimation.
+    Frames are retained only when the probe's decoded_bytes estimate fits in VISUALIZATION_FRAME_CACHE_BYTES,
+    so clips that cannot be cached never copy frames.
+    Returns (landmarks_list, validation_result, frame_count, frames), where frames are the decoded frames
+    when they were retained and None otherwise.
+    """
+    required_landmarks = get_required_landmarks(exercise)
+    frame_cache = None
+    if decoded_bytes <= VISUALIZATION_FRAME_CACHE_BYTES:
+        # retain_frames still enforces the budget in case the probe's frame count was an underestimate
+        frame_cache = {"max_bytes": VISUALIZATION_FRAME_CACHE_BYTES}
+    landmarks_list, validation_result, frame_validation = process_video_streaming_pose(
+        temp_path, validate=True, required_landmarks=required_landmarks, frame_cache=frame_cache
+    )
+    if frame_validation and not frame_validation.get("is_valid", True):
+        raise HTTPException(status_code=400, detail={
+            "error": "frame_extraction_failed",
+            "message": frame_validation.get("errors", ["Frame extraction failed"])[0],
+            "frame_count": frame_validation.get("frame_count", 0),
+            "valid_frame_count": frame_validation.get("valid_frame_count", 0),
+            "recommendation": frame_validation.get("recommendation", "Please try re-exporting the video")
+        })
+    frames = frame_cache.get("frames") if frame_cache else None
+    return landmarks_list, validation_result, frame_validation.get("frame_count", 0), frames
+
+
+def _process_upload(video: UploadFile, exercise: int, temp_path: str, file_info: dict, file_size: int,
+                    fps: float, decoded_bytes: int) -> dict:
+    """Runs the blocking decode, pose, analysis and visualization stages. Called from a worker thread so the event loop stays free."""
+    landmarks_list, validation_result, frame_count, frames = _extract_upload_landmarks(temp_path, exercise, decoded_bytes)
+    _check_landmark_validation(validation_result)
+    calc_results, cam_info, form_analysis, squat_phases = _process_video_analysis(
+        video, exercise, fps, landmarks_list, validation_result
+    )
+    output_path, output_filename = _create_visualization(
+        temp_path, landmarks_list, fps, calc_results, form_analysis, frames
+    )
+    return _build_response(exercise, file_info, file_size, frame_count, Path(output_path),
+                          output_filename, calc_results, cam_info, form_analysis, squat_phases)
 
 
 @app.post("/upload-video")
@@ -541,29 +635,14 @@ async def upload_video(
         client_ip = _get_client_ip(request)
         _check_rate_limit(client_ip)
         _validate_exercise(exercise)
+        file_size = _get_upload_size(video)
+        file_info, _ = await _validate_file(video, file_size)
         temp_path = await save_video_temp(video)
-        file_size = os.path.getsize(temp_path)
-        file_info = await validate_uploaded_file(temp_path, video, file_size)
-        frames, fps, frame_validation, fps_validation = extract_frames(temp_path, validate=True)
-        if frame_validation and not frame_validation.get("is_valid", True):
-            raise HTTPException(status_code=400, detail={
-                "error": "frame_extraction_failed",
-                "message": frame_validation.get("errors", ["Frame extraction failed"])[0],
-                "frame_count": frame_validation.get("frame_count", 0),
-                "valid_frame_count": frame_validation.get("valid_frame_count", 0),
-                "recommendation": frame_validation.get("recommendation", "Please try re-exporting the video")
-            })
-        required_landmarks = get_required_landmarks(exercise)
-        landmarks_list, validation_result = process_frames_with_pose(frames, validate=True, required_landmarks=required_landmarks)
-        validate_video_data(frames, fps, landmarks_list, validation_result, exercise, skip_file_validations=False)
-        calc_results, cam_info, form_analysis, squat_phases = _process_video_analysis(
-            video, exercise, frames, fps, landmarks_list, validation_result
-        )
-        output_path, output_filename = _create_visualization(
-            frames, landmarks_list, fps, calc_results, form_analysis
+        file_info, fps, decoded_bytes = await validate_uploaded_file(temp_path, file_info)
+        response = await run_in_threadpool(
+            _process_upload, video, exercise, temp_path, file_info, file_size, fps, decoded_bytes
         )
-        return _build_response(exercise, file_info, file_size, frames, Path(output_path),
-                              output_filename, calc_results, cam_info, form_analysis, squat_phases)
+        return ORJSONResponse(response)
     except Exception as e:
         _handle_upload_errors(e)
     finally:
@@ -573,5 +652,7 @@ async def upload_video(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Rate limiting state is per process, so extra workers each get their own upload budget.
+    workers = int(os.environ.get("UVICORN_WORKERS", "1"))
+    uvicorn.run("src.app:app", host="0.0.0.0", port=8000, workers=workers)
 
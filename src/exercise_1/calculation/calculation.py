@@ -4,6 +4,7 @@ Uses pose estimation data points to determine form correctness
 """
 
 import math
+import numpy as np
 
 
 def _calculate_z_diffs_from_frames(landmarks_list: list) -> float:
@@ -14,11 +15,8 @@ def _calculate_z_diffs_from_frames(landmarks_list: list) -> float:
     for i in range(num_frames):
         if not landmarks_list[i]:
             continue
-        frame_z_diffs = []
-        for left_idx, right_idx in landmark_pairs:
-            left_pt = landmarks_list[i].landmark[left_idx]
-            right_pt = landmarks_list[i].landmark[right_idx]
-            frame_z_diffs.append(right_pt.z - left_pt.z)
+        points = landmarks_list[i].landmark
+        frame_z_diffs = [points[right_idx].z - points[left_idx].z for left_idx, right_idx in landmark_pairs]
         if frame_z_diffs:
             z_diffs.append(sum(frame_z_diffs) / len(frame_z_diffs))
     return sum(z_diffs) / len(z_diffs) if z_diffs else 0.0
@@ -82,111 +80,148 @@ def detect_camera_angle(landmarks_list: list) -> dict:
     return result
 
 
+def _fold_segment_angle(angle_from_horizontal):
+    """Folds an angle from horizontal in [0, 360) to its deviation from vertical in [0, 90]. Accepts floats or arrays."""
+    return abs(angle_from_horizontal % 180 - 90)
+
+
+def _fold_ankle_segment_angle(angle_from_horizontal):
+    """Folds an angle from horizontal in [0, 360) to the heel-knee angle in [0, 90]. Accepts floats or arrays."""
+    a = angle_from_horizontal
+    return np.where(a <= 180, 90 - abs(a - 90), (270 - a) % 90)
+
+
 def get_segment_angle(point1, point2) -> float:
     """Calculates angle of segment from vertical. Returns angle in degrees (0 when upright, 90 when bent forward)."""
     dx = point2.x - point1.x
     dy = point2.y - point1.y
-    angle_from_horizontal = math.degrees(math.atan2(-dy, dx))
-    if angle_from_horizontal < 0:
-        angle_from_horizontal += 360
-    if angle_from_horizontal <= 90:
-        return 90 - angle_from_horizontal
-    elif angle_from_horizontal <= 180:
-        return angle_from_horizontal - 90
-    elif angle_from_horizontal <= 270:
-        return 270 - angle_from_horizontal
-    else:
-        return angle_from_horizontal - 270
+    return _fold_segment_angle(math.degrees(math.atan2(-dy, dx)) % 360)
+
+
+_SQUAT_LANDMARK_INDICES = [11, 12, 23, 24, 25, 26, 27, 28, 29, 30]
+
+
+def landmarks_to_array(landmarks_list: list, indices: list = _SQUAT_LANDMARK_INDICES,
+                       frame_mask: np.ndarray = None) -> tuple:
+    """Packs x/y of the given landmark indices (default: the squat landmarks - shoulders, hips, knees,
+    ankles, heels) into an (N, 33, 2) array in one walk so the calculation and form analysis can share them;
+    other slots stay NaN. Frames excluded by frame_mask are skipped without touching their landmarks.
+    Returns (xy, mask of frames that were packed)."""
+    landmarks_list = landmarks_list or []
+    packed = np.zeros(len(landmarks_list), dtype=bool)
+    rows = []
+    for i, landmarks in enumerate(landmarks_list):
+        if not landmarks or (frame_mask is not None and not frame_mask[i]):
+            continue
+        points = landmarks.landmark
+        rows.append([(point.x, point.y) for point in (points[idx] for idx in indices)])
+        packed[i] = True
+    xy = np.full((len(landmarks_list), 33, 2), np.nan)
+    if rows:
+        xy[np.ix_(packed, indices)] = rows
+    return xy, packed
+
+
+def _frame_valid_mask(frame_count: int, validation_result: dict = None) -> np.ndarray:
+    """Per-frame validity from the validation result; frames it does not cover count as valid.
+    Uses the precomputed valid_frame_mask when present instead of walking per_frame_results."""
+    frame_valid = np.ones(frame_count, dtype=bool)
+    if not validation_result:
+        return frame_valid
+    valid_frame_mask = validation_result.get("valid_frame_mask")
+    if valid_frame_mask is None:
+        valid_frame_mask = [result.get("is_valid", True) for result in validation_result.get("per_frame_results", [])]
+    n = min(len(valid_frame_mask), frame_count)
+    frame_valid[:n] = valid_frame_mask[:n]
+    return frame_valid
+
+
+def _prepare_frames(landmarks_list: list, validation_result: dict = None, landmarks_xy: tuple = None) -> tuple:
+    """Converts landmarks of validated frames to an xy array (or reuses landmarks_to_array output).
+    Returns (xy, mask of frames usable for angle math)."""
+    frame_valid = _frame_valid_mask(len(landmarks_list), validation_result)
+    if landmarks_xy is None:
+        return landmarks_to_array(landmarks_list, frame_mask=frame_valid)
+    xy, packed = landmarks_xy
+    return xy, packed & frame_valid
+
+
+def _angles_from_horizontal(xy: np.ndarray, start_idx, end_idx) -> np.ndarray:
+    """Angle of each frame's start->end segment from horizontal, in [0, 360) degrees.
+    Index lists gather several segments at once and return an (N, len(indices)) array."""
+    dx = xy[:, end_idx, 0] - xy[:, start_idx, 0]
+    dy = xy[:, end_idx, 1] - xy[:, start_idx, 1]
+    return np.degrees(np.arctan2(-dy, dx)) % 360
+
+
+_SQUAT_SEGMENTS = {
+    "torso": (_fold_segment_angle, (23, 11), (24, 12)),
+    "quad": (_fold_segment_angle, (23, 25), (24, 26)),
+    "ankle": (_fold_ankle_segment_angle, (29, 25), (30, 26))
+}
+
+
+def _side_angles(xy: np.ndarray, metric: str) -> tuple:
+    """Returns (left, right) per-frame segment angles for a squat metric."""
+    fold, left_segment, right_segment = _SQUAT_SEGMENTS[metric]
+    starts, ends = zip(left_segment, right_segment)
+    angles = fold(_angles_from_horizontal(xy, list(starts), list(ends)))
+    return angles[:, 0], angles[:, 1]
+
+
+def _squat_side_angles(xy: np.ndarray) -> dict:
+    """Computes all six squat segment angles with one gather and one arctan2 over an (N, 6) block.
+    Returns {metric: (left, right)}."""
+    segments = [segment for _, left, right in _SQUAT_SEGMENTS.values() for segment in (left, right)]
+    starts, ends = zip(*segments)
+    angles = _angles_from_horizontal(xy, list(starts), list(ends))
+    side_angles = {}
+    for column, (metric, (fold, _, _)) in zip(range(0, angles.shape[1], 2), _SQUAT_SEGMENTS.items()):
+        pair = fold(angles[:, column:column + 2])
+        side_angles[metric] = (pair[:, 0], pair[:, 1])
+    return side_angles
+
+
+def to_optional_list(values: np.ndarray, mask: np.ndarray) -> list:
+    """Converts per-frame values to a list, with None for frames outside the mask."""
+    result = values.tolist()
+    for i in np.flatnonzero(~mask).tolist():
+        result[i] = None
+    return result
 
 
 def calculate_torso_angle_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
     """Calculates torso angle for each frame."""
     if not landmarks_list:
         return []
-    angles = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    required = [11, 12, 23, 24]
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            angles.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                angles.append(None)
-                continue
-        left_angle = get_segment_angle(landmarks.landmark[23], landmarks.landmark[11])
-        right_angle = get_segment_angle(landmarks.landmark[24], landmarks.landmark[12])
-        if left_angle is not None and right_angle is not None:
-            angles.append((left_angle + right_angle) / 2)
-        else:
-            angles.append(None)
-    return angles
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "torso")
+    return to_optional_list((left_angle + right_angle) / 2, mask)
 
 
 def calculate_quad_angle_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
     """Calculates quad angle for each frame."""
     if not landmarks_list:
         return []
-    angles = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            angles.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                angles.append(None)
-                continue
-        left_angle = get_segment_angle(landmarks.landmark[23], landmarks.landmark[25])
-        right_angle = get_segment_angle(landmarks.landmark[24], landmarks.landmark[26])
-        if left_angle is not None and right_angle is not None:
-            angles.append((left_angle + right_angle) / 2)
-        else:
-            angles.append(None)
-    return angles
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "quad")
+    return to_optional_list((left_angle + right_angle) / 2, mask)
 
 
 def get_ankle_segment_angle(point1, point2) -> float:
     """Calculates angle of heel-knee segment. Returns angle in degrees (90 when upright, < 90 when knee forward)."""
     dx = point2.x - point1.x
     dy = point2.y - point1.y
-    angle_from_horizontal = math.degrees(math.atan2(-dy, dx))
-    if angle_from_horizontal < 0:
-        angle_from_horizontal += 360
-    if angle_from_horizontal <= 90:
-        return angle_from_horizontal
-    elif angle_from_horizontal <= 180:
-        return 180 - angle_from_horizontal
-    elif angle_from_horizontal <= 270:
-        return 270 - angle_from_horizontal
-    else:
-        return 360 - angle_from_horizontal
+    return float(_fold_ankle_segment_angle(math.degrees(math.atan2(-dy, dx)) % 360))
 
 
 def calculate_ankle_angle_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
     """Calculates ankle angle for each frame from heel-knee segments."""
     if not landmarks_list:
         return []
-    angles = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            angles.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                angles.append(None)
-                continue
-        left_angle = get_ankle_segment_angle(landmarks.landmark[29], landmarks.landmark[25])
-        right_angle = get_ankle_segment_angle(landmarks.landmark[30], landmarks.landmark[26])
-        if left_angle is not None and right_angle is not None:
-            angles.append((left_angle + right_angle) / 2)
-        else:
-            angles.append(None)
-    return angles
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "ankle")
+    return to_optional_list((left_angle + right_angle) / 2, mask)
 
 
 def calculate_torso_asymmetry_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
@@ -195,24 +230,9 @@ def calculate_torso_asymmetry_per_frame(landmarks_list: list, validation_result:
     perspective effects can create apparent asymmetry even with symmetric form."""
     if not landmarks_list:
         return []
-    asymmetry = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            asymmetry.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                asymmetry.append(None)
-                continue
-        left_angle = get_segment_angle(landmarks.landmark[23], landmarks.landmark[11])
-        right_angle = get_segment_angle(landmarks.landmark[24], landmarks.landmark[12])
-        if left_angle is not None and right_angle is not None:
-            asymmetry.append(right_angle - left_angle)
-        else:
-            asymmetry.append(None)
-    return asymmetry
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "torso")
+    return to_optional_list(right_angle - left_angle, mask)
 
 
 def calculate_quad_asymmetry_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
@@ -221,24 +241,9 @@ def calculate_quad_asymmetry_per_frame(landmarks_list: list, validation_result:
     perspective effects can create apparent asymmetry even with symmetric form."""
     if not landmarks_list:
         return []
-    asymmetry = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            asymmetry.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                asymmetry.append(None)
-                continue
-        left_angle = get_segment_angle(landmarks.landmark[23], landmarks.landmark[25])
-        right_angle = get_segment_angle(landmarks.landmark[24], landmarks.landmark[26])
-        if left_angle is not None and right_angle is not None:
-            asymmetry.append(right_angle - left_angle)
-        else:
-            asymmetry.append(None)
-    return asymmetry
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "quad")
+    return to_optional_list(right_angle - left_angle, mask)
 
 
 def calculate_ankle_asymmetry_per_frame(landmarks_list: list, validation_result: dict = None) -> list:
@@ -247,36 +252,27 @@ def calculate_ankle_asymmetry_per_frame(landmarks_list: list, validation_result:
     perspective effects can create apparent asymmetry even with symmetric form."""
     if not landmarks_list:
         return []
-    asymmetry = []
-    per_frame_results = validation_result.get("per_frame_results", []) if validation_result else []
-    for i, landmarks in enumerate(landmarks_list):
-        if not landmarks:
-            asymmetry.append(None)
-            continue
-        if per_frame_results and i < len(per_frame_results):
-            frame_valid = per_frame_results[i].get("is_valid", True)
-            if not frame_valid:
-                asymmetry.append(None)
-                continue
-        left_angle = get_ankle_segment_angle(landmarks.landmark[29], landmarks.landmark[25])
-        right_angle = get_ankle_segment_angle(landmarks.landmark[30], landmarks.landmark[26])
-        if left_angle is not None and right_angle is not None:
-            asymmetry.append(right_angle - left_angle)
-        else:
-            asymmetry.append(None)
-    return asymmetry
-
-
-def calculate_squat_form(landmarks_list: list, validation_result: dict = None) -> dict:
-    """Calculates squat form metrics from pose landmarks. Returns per-frame angles and asymmetry."""
-    angles = {
-        "torso_angle": calculate_torso_angle_per_frame(landmarks_list, validation_result),
-        "quad_angle": calculate_quad_angle_per_frame(landmarks_list, validation_result),
-        "ankle_angle": calculate_ankle_angle_per_frame(landmarks_list, validation_result)
-    }
-    asymmetry = {
-        "torso_asymmetry": calculate_torso_asymmetry_per_frame(landmarks_list, validation_result),
-        "quad_asymmetry": calculate_quad_asymmetry_per_frame(landmarks_list, validation_result),
-        "ankle_asymmetry": calculate_ankle_asymmetry_per_frame(landmarks_list, validation_result)
-    }
+    xy, mask = _prepare_frames(landmarks_list, validation_result)
+    left_angle, right_angle = _side_angles(xy, "ankle")
+    return to_optional_list(right_angle - left_angle, mask)
+
+
+def _empty_squat_form(frame_count: int) -> dict:
+    """Builds the squat form result for a clip with no usable frames (all per-frame values None)."""
+    angles = {f"{metric}_angle": [None] * frame_count for metric in _SQUAT_SEGMENTS}
+    asymmetry = {f"{metric}_asymmetry": [None] * frame_count for metric in _SQUAT_SEGMENTS}
+    return {"exercise": 1, "angles_per_frame": angles, "asymmetry_per_frame": asymmetry}
+
+
+def calculate_squat_form(landmarks_list: list, validation_result: dict = None, landmarks_xy: tuple = None) -> dict:
+    """Calculates squat form metrics from pose landmarks. Returns per-frame angles and asymmetry.
+    Landmarks are converted once (or taken from landmarks_xy) and each left/right segment angle
+    is shared by the angle and asymmetry outputs."""
+    xy, mask = _prepare_frames(landmarks_list or [], validation_result, landmarks_xy)
+    if not mask.any():
+        return _empty_squat_form(len(mask))
+    angles, asymmetry = {}, {}
+    for metric, (left_angle, right_angle) in _squat_side_angles(xy).items():
+        angles[f"{metric}_angle"] = to_optional_list((left_angle + right_angle) / 2, mask)
+        asymmetry[f"{metric}_asymmetry"] = to_optional_list(right_angle - left_angle, mask)
     return {"exercise": 1, "angles_per_frame": angles, "asymmetry_per_frame": asymmetry}
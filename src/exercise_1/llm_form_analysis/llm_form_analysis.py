@@ -1,126 +1,121 @@
 """Exercise 1 form analysis component."""
 
+from bisect import bisect_right
+import numpy as np
+from src.exercise_1.calculation.calculation import landmarks_to_array, to_optional_list
 
-def _is_local_max(i: int, angles_with_indices: list, min_height: float) -> bool:
-    """Checks if index i is a local maximum above min_height."""
-    if i < 2 or i >= len(angles_with_indices) - 2:
-        return False
-    prev2, prev1 = angles_with_indices[i-2][1], angles_with_indices[i-1][1]
-    curr = angles_with_indices[i][1]
-    next1, next2 = angles_with_indices[i+1][1], angles_with_indices[i+2][1]
-    return curr > prev1 and curr > next1 and curr >= min_height and curr > prev2 and curr > next2
+_VALGUS_LANDMARK_INDICES = [23, 24, 25, 26, 27, 28]
+_BASELINE_EDGE_FRAMES = 10
+_SQUAT_THRESHOLD_OFFSET = 20
+_BOUNCE_WINDOW_SECONDS = 1.0
+
+
+def _local_max_indices(values: np.ndarray, min_height: float) -> np.ndarray:
+    """Indices i (2 <= i < n-2) where values[i] >= min_height and exceeds both neighbours on each side."""
+    if len(values) < 5:
+        return np.empty(0, dtype=np.int64)
+    curr = values[2:-2]
+    mask = ((curr > values[1:-3]) & (curr > values[3:-1]) & (curr >= min_height)
+            & (curr > values[:-4]) & (curr > values[4:]))
+    return np.flatnonzero(mask) + 2
 
 
-def _filter_peaks_by_distance(candidates: list, min_distance: int) -> list:
-    """Filters candidate peaks by minimum distance between them."""
+def _filter_peaks_by_distance(candidates: list, values: list, min_distance: int) -> list:
+    """Filters candidate peak indices by minimum distance between them, keeping the higher peak."""
     if not candidates:
         return []
-    peaks = [candidates[0]]
-    for idx, peak_data in candidates[1:]:
-        frame_diff = idx - peaks[-1][0]
-        if frame_diff >= min_distance:
-            peaks.append((idx, peak_data))
-        elif peak_data[1] > peaks[-1][1][1]:
-            peaks[-1] = (idx, peak_data)
-    return [p[1] for p in peaks]
+    peaks = []
+    last = candidates[0]
+    for idx in candidates[1:]:
+        if idx - last >= min_distance:
+            peaks.append(last)
+            last = idx
+        elif values[idx] > values[last]:
+            last = idx
+    peaks.append(last)
+    return peaks
 
 
-def _find_peaks(angles_with_indices: list, min_height: float, min_distance: int = 30) -> list:
-    """Finds local maxima (peaks) representing bottom of squat."""
-    candidates = [(i, angles_with_indices[i]) for i in range(2, len(angles_with_indices) - 2)
-                  if _is_local_max(i, angles_with_indices, min_height)]
-    return _filter_peaks_by_distance(candidates, min_distance)
+def _find_peaks(values: np.ndarray, min_height: float, min_distance: int = 30) -> list:
+    """Finds local maxima (peaks) representing bottom of squat. Returns indices into values."""
+    candidates = _local_max_indices(values, min_height).tolist()
+    return _filter_peaks_by_distance(candidates, values.tolist(), min_distance)
 
 
-def _filter_bounce_reps(peaks_with_indices: list, angles_with_indices: list, bounce_threshold: int = 60) -> list:
+def _filter_bounce_reps(peaks: list, values: np.ndarray, bounce_threshold: int = 60) -> list:
     """Filters out bounce patterns (two close peaks = one rep)."""
-    if len(peaks_with_indices) < 2:
-        return peaks_with_indices
-    filtered = [peaks_with_indices[0]]
-    for i in range(1, len(peaks_with_indices)):
-        prev_idx, prev_peak_data = peaks_with_indices[i-1]
-        curr_idx, curr_peak_data = peaks_with_indices[i]
-        if curr_idx - prev_idx < bounce_threshold and curr_peak_data[1] >= prev_peak_data[1] * 0.9:
-            filtered[-1] = (curr_idx, curr_peak_data)
+    if len(peaks) < 2:
+        return peaks
+    peak_values = values[peaks].tolist()
+    filtered = [peaks[0]]
+    for i in range(1, len(peaks)):
+        if peaks[i] - peaks[i-1] < bounce_threshold and peak_values[i] >= peak_values[i-1] * 0.9:
+            filtered[-1] = peaks[i]
         else:
-            filtered.append((curr_idx, curr_peak_data))
+            filtered.append(peaks[i])
     return filtered
 
 
-def _find_rep_start_end(angles_with_indices: list, peak_frame: int, baseline: float, threshold: float) -> tuple:
-    """Finds start and end frames for a single rep around a peak."""
-    peak_idx = next(i for i, (f, _) in enumerate(angles_with_indices) if f == peak_frame)
-    start_frame = None
-    for i in range(peak_idx - 1, -1, -1):
-        if angles_with_indices[i][1] < threshold:
-            start_frame = angles_with_indices[i+1][0] if i+1 <= peak_idx else peak_frame
-            break
-    if start_frame is None:
-        start_frame = angles_with_indices[0][0]
-    end_frame = None
-    for i in range(peak_idx + 1, len(angles_with_indices)):
-        if angles_with_indices[i][1] < threshold:
-            end_frame = angles_with_indices[i-1][0] if i-1 >= peak_idx else peak_frame
-            break
-    if end_frame is None:
-        end_frame = angles_with_indices[-1][0]
-    return start_frame, end_frame
-
-
-def _calculate_baseline(valid_angles: list) -> float:
+def _calculate_baseline(values: np.ndarray) -> float:
     """Calculates baseline angle from first/last frames."""
-    if len(valid_angles) > 20:
-        return min([a for _, a in valid_angles[:10]] + [a for _, a in valid_angles[-10:]])
-    return min([a for _, a in valid_angles])
+    if len(values) > 2 * _BASELINE_EDGE_FRAMES:
+        return float(min(values[:_BASELINE_EDGE_FRAMES].min(), values[-_BASELINE_EDGE_FRAMES:].min()))
+    return float(values.min())
 
 
-def _build_reps_from_peaks(filtered_peaks: list, valid_angles: list, baseline: float, threshold: float) -> list:
-    """Builds rep list from filtered peaks."""
-    reps = []
-    for peak_idx, (peak_frame, peak_angle) in filtered_peaks:
-        start_frame, end_frame = _find_rep_start_end(valid_angles, peak_frame, baseline, threshold)
-        if start_frame is not None and end_frame is not None and start_frame < end_frame:
-            reps.append({"start_frame": start_frame, "bottom_frame": peak_frame, "end_frame": end_frame})
-    return reps
+def _build_reps_from_peaks(peaks: list, frames: np.ndarray, values: np.ndarray, threshold: float) -> list:
+    """Builds rep list from filtered peaks. Each rep spans the run of frames at or above threshold around its peak."""
+    below = np.concatenate(([-1], np.flatnonzero(values < threshold), [len(values)]))
+    pos = np.searchsorted(below, peaks)
+    starts = frames[below[pos - 1] + 1].tolist()
+    ends = frames[below[pos] - 1].tolist()
+    return [{"start_frame": start, "bottom_frame": bottom, "end_frame": end}
+            for start, bottom, end in zip(starts, frames[peaks].tolist(), ends) if start < end]
 
 
 def detect_squat_phases(quad_angles_per_frame: list, fps: float = 30.0) -> dict:
     """Detects all squat reps. Filters bounce patterns."""
-    if not quad_angles_per_frame or all(a is None for a in quad_angles_per_frame):
+    if not quad_angles_per_frame:
         return {"reps": []}
-    valid_angles = [(i, a) for i, a in enumerate(quad_angles_per_frame) if a is not None]
-    if not valid_angles:
+    angles = np.array(quad_angles_per_frame, dtype=np.float64)
+    frames = np.flatnonzero(~np.isnan(angles))
+    if not frames.size:
         return {"reps": []}
-    baseline = _calculate_baseline(valid_angles)
-    squat_threshold = baseline + 20
-    peaks = _find_peaks(valid_angles, squat_threshold)
+    values = angles[frames]
+    squat_threshold = _calculate_baseline(values) + _SQUAT_THRESHOLD_OFFSET
+    peaks = _find_peaks(values, squat_threshold)
     if not peaks:
         return {"reps": []}
-    bounce_threshold_frames = int(fps * 1.0)
-    peaks_with_indices = [(next(i for i, (f, _) in enumerate(valid_angles) if f == p[0]), p) for p in peaks]
-    filtered_peaks = _filter_bounce_reps(peaks_with_indices, valid_angles, bounce_threshold_frames)
-    return {"reps": _build_reps_from_peaks(filtered_peaks, valid_angles, baseline, squat_threshold)}
+    filtered_peaks = _filter_bounce_reps(peaks, values, int(fps * _BOUNCE_WINDOW_SECONDS))
+    return {"reps": _build_reps_from_peaks(filtered_peaks, frames, values, squat_threshold)}
+
+
+def _collect_rep_angles(angles_per_frame: list, reps: list) -> list:
+    """Concatenates the angles of each rep's frame range; returns the input unchanged when there are no reps."""
+    if not reps:
+        return angles_per_frame
+    active_angles = []
+    for rep in reps:
+        active_angles.extend(angles_per_frame[rep["start_frame"]:rep["end_frame"] + 1])
+    return active_angles
 
 
 def _filter_to_active_phases(torso_angles_per_frame: list, quad_angles_per_frame: list) -> list:
     """Filters torso angles to only active squat phases."""
     phases = detect_squat_phases(quad_angles_per_frame)
-    if not phases.get("reps"):
-        return torso_angles_per_frame
-    active_frames = []
-    for rep in phases["reps"]:
-        active_frames.extend(range(rep["start_frame"], rep["end_frame"] + 1))
-    if not active_frames:
-        return torso_angles_per_frame
-    return [torso_angles_per_frame[i] if i < len(torso_angles_per_frame) else None for i in active_frames]
+    return _collect_rep_angles(torso_angles_per_frame, phases.get("reps"))
+
+
+def _min_max_mean(values: list) -> tuple:
+    """Returns (min, max, mean) of a non-empty list, converting it to an array once."""
+    arr = np.asarray(values, dtype=np.float64)
+    return float(arr.min()), float(arr.max()), float(arr.mean())
 
 
 def _calculate_torso_metrics(valid_angles: list) -> tuple:
     """Calculates max, avg, and range from valid angles."""
-    max_angle = max(valid_angles)
-    avg_angle = sum(valid_angles) / len(valid_angles)
-    angle_range = max(valid_angles) - min(valid_angles)
-    return max_angle, avg_angle, angle_range
+    min_angle, max_angle, avg_angle = _min_max_mean(valid_angles)
+    return max_angle, avg_angle, max_angle - min_angle
 
 
 def _determine_torso_status(max_angle: float, avg_angle: float) -> tuple:
@@ -138,13 +133,17 @@ def _determine_torso_status(max_angle: float, avg_angle: float) -> tuple:
         return "poor", 50, f"Excessive forward lean detected. Max angle: {max_angle:.1f}° (>45°). Research indicates this exceeds recommended range and may reduce squat effectiveness."
 
 
-def analyze_torso_angle(torso_angles_per_frame: list, quad_angles_per_frame: list = None, validation_result: dict = None) -> dict:
-    """Analyzes torso angle for squat form using evidence-based thresholds."""
-    if not torso_angles_per_frame or all(a is None for a in torso_angles_per_frame):
+def analyze_torso_angle(torso_angles_per_frame: list, quad_angles_per_frame: list = None, validation_result: dict = None,
+                        reps: list = None) -> dict:
+    """Analyzes torso angle for squat form using evidence-based thresholds.
+    Pass already-detected reps to skip re-running phase detection on quad_angles_per_frame."""
+    if not torso_angles_per_frame or not any(a is not None for a in torso_angles_per_frame):
         if validation_result and validation_result.get("valid_frame_percentage", 1.0) < 0.3:
             return {"status": "error", "message": f"Insufficient pose detection ({validation_result.get('valid_frame_percentage', 0):.0%} of frames). Please ensure person is fully visible."}
         return {"status": "error", "message": "No torso angle data available"}
-    if quad_angles_per_frame:
+    if reps is not None:
+        torso_angles_per_frame = _collect_rep_angles(torso_angles_per_frame, reps)
+    elif quad_angles_per_frame:
         torso_angles_per_frame = _filter_to_active_phases(torso_angles_per_frame, quad_angles_per_frame)
     valid_angles = [a for a in torso_angles_per_frame if a is not None]
     if not valid_angles:
@@ -157,10 +156,8 @@ def analyze_torso_angle(torso_angles_per_frame: list, quad_angles_per_frame: lis
 
 def _calculate_quad_metrics(valid_angles: list) -> tuple:
     """Calculates max (max depth), avg, and range from valid quad angles."""
-    max_angle = max(valid_angles)
-    avg_angle = sum(valid_angles) / len(valid_angles)
-    angle_range = max(valid_angles) - min(valid_angles)
-    return max_angle, avg_angle, angle_range
+    min_angle, max_angle, avg_angle = _min_max_mean(valid_angles)
+    return max_angle, avg_angle, max_angle - min_angle
 
 
 def _determine_quad_status(max_angle: float, avg_angle: float) -> tuple:
@@ -175,11 +172,9 @@ def _determine_quad_status(max_angle: float, avg_angle: float) -> tuple:
 
 def analyze_quad_angle(quad_angles_per_frame: list) -> dict:
     """Analyzes quad angle (squat depth) using evidence-based thresholds."""
-    if not quad_angles_per_frame or all(a is None for a in quad_angles_per_frame):
-        return {"status": "error", "message": "No quad angle data available"}
-    valid_angles = [a for a in quad_angles_per_frame if a is not None]
+    valid_angles = [a for a in quad_angles_per_frame if a is not None] if quad_angles_per_frame else []
     if not valid_angles:
-        return {"status": "error", "message": "No valid quad angle data"}
+        return {"status": "error", "message": "No quad angle data available"}
     max_angle, avg_angle, angle_range = _calculate_quad_metrics(valid_angles)
     status, score, message = _determine_quad_status(max_angle, avg_angle)
     return {"status": status, "score": score, "message": message, "max_angle": round(max_angle, 1),
@@ -188,10 +183,8 @@ def analyze_quad_angle(quad_angles_per_frame: list) -> dict:
 
 def _calculate_ankle_metrics(valid_angles: list) -> tuple:
     """Calculates min (max dorsiflexion), avg, and range from valid ankle angles."""
-    min_angle = min(valid_angles)
-    avg_angle = sum(valid_angles) / len(valid_angles)
-    angle_range = max(valid_angles) - min(valid_angles)
-    return min_angle, avg_angle, angle_range
+    min_angle, max_angle, avg_angle = _min_max_mean(valid_angles)
+    return min_angle, avg_angle, max_angle - min_angle
 
 
 def _determine_ankle_status(min_angle: float, avg_angle: float) -> tuple:
@@ -206,11 +199,9 @@ def _determine_ankle_status(min_angle: float, avg_angle: float) -> tuple:
 
 def analyze_ankle_angle(ankle_angles_per_frame: list) -> dict:
     """Analyzes ankle angle (ankle mobility/dorsiflexion). Research shows limited dorsiflexion restricts squat depth."""
-    if not ankle_angles_per_frame or all(a is None for a in ankle_angles_per_frame):
-        return {"status": "error", "message": "No ankle angle data available"}
-    valid_angles = [a for a in ankle_angles_per_frame if a is not None]
+    valid_angles = [a for a in ankle_angles_per_frame if a is not None] if ankle_angles_per_frame else []
     if not valid_angles:
-        return {"status": "error", "message": "No valid ankle angle data"}
+        return {"status": "error", "message": "No ankle angle data available"}
     min_angle, avg_angle, angle_range = _calculate_ankle_metrics(valid_angles)
     status, score, message = _determine_ankle_status(min_angle, avg_angle)
     return {"status": status, "score": score, "message": message, "min_angle": round(min_angle, 1),
@@ -219,11 +210,9 @@ def analyze_ankle_angle(ankle_angles_per_frame: list) -> dict:
 
 def _calculate_asymmetry_metrics(valid_asymmetry: list) -> tuple:
     """Calculates max absolute, avg, and range from valid asymmetry values."""
-    abs_asymmetry = [abs(a) for a in valid_asymmetry]
-    max_asymmetry = max(abs_asymmetry)
-    avg_asymmetry = sum(valid_asymmetry) / len(valid_asymmetry)
-    avg_abs_asymmetry = sum(abs_asymmetry) / len(abs_asymmetry)
-    return max_asymmetry, avg_asymmetry, avg_abs_asymmetry
+    asymmetry = np.asarray(valid_asymmetry, dtype=np.float64)
+    abs_asymmetry = np.abs(asymmetry)
+    return float(abs_asymmetry.max()), float(asymmetry.mean()), float(abs_asymmetry.mean())
 
 
 def _determine_asymmetry_status(max_asymmetry: float, avg_abs_asymmetry: float, side: str) -> tuple:
@@ -238,41 +227,33 @@ def _determine_asymmetry_status(max_asymmetry: float, avg_abs_asymmetry: float,
 
 def analyze_asymmetry(asymmetry_per_frame: list, asymmetry_type: str) -> dict:
     """Analyzes asymmetry using research-based thresholds (<5° good, 5-10° warning, >10° poor)."""
-    if not asymmetry_per_frame or all(a is None for a in asymmetry_per_frame):
-        return {"status": "error", "message": f"No {asymmetry_type} asymmetry data available"}
-    valid_asymmetry = [a for a in asymmetry_per_frame if a is not None]
+    valid_asymmetry = [a for a in asymmetry_per_frame if a is not None] if asymmetry_per_frame else []
     if not valid_asymmetry:
-        return {"status": "error", "message": f"No valid {asymmetry_type} asymmetry data"}
+        return {"status": "error", "message": f"No {asymmetry_type} asymmetry data available"}
     max_asymmetry, avg_asymmetry, avg_abs_asymmetry = _calculate_asymmetry_metrics(valid_asymmetry)
     status, score, message = _determine_asymmetry_status(max_asymmetry, avg_abs_asymmetry, asymmetry_type)
     return {"status": status, "score": score, "message": message, "max_asymmetry": round(max_asymmetry, 1),
             "avg_asymmetry": round(avg_asymmetry, 1), "avg_abs_asymmetry": round(avg_abs_asymmetry, 1)}
 
 
-def _extract_per_rep_metrics(angles_per_frame: list, reps: list, metric_type: str) -> list:
-    """Extracts per-rep metrics (max for depth, avg for torso/asymmetry)."""
-    per_rep_values = []
-    for rep in reps:
-        rep_frames = range(rep["start_frame"], rep["end_frame"] + 1)
-        rep_angles = [angles_per_frame[i] if i < len(angles_per_frame) and angles_per_frame[i] is not None
-                     else None for i in rep_frames]
-        valid_angles = [a for a in rep_angles if a is not None]
-        if not valid_angles:
-            continue
-        if metric_type == "max":
-            per_rep_values.append(max(valid_angles))
-        else:
-            per_rep_values.append(sum(valid_angles) / len(valid_angles))
-    return per_rep_values
+def _extract_per_rep_metrics(angles_per_frame: list, reps: list, metric_type: str) -> np.ndarray:
+    """Extracts per-rep metrics (max for depth, avg for torso/asymmetry). Reps without valid angles are dropped."""
+    angles = np.array(angles_per_frame, dtype=np.float64)
+    per_rep_values = np.full(len(reps), np.nan)
+    for k, rep in enumerate(reps):
+        rep_angles = angles[rep["start_frame"]:rep["end_frame"] + 1]
+        valid_angles = rep_angles[~np.isnan(rep_angles)]
+        if valid_angles.size:
+            per_rep_values[k] = valid_angles.max() if metric_type == "max" else valid_angles.mean()
+    return per_rep_values[~np.isnan(per_rep_values)]
 
 
-def _calculate_consistency_metrics(per_rep_values: list) -> tuple:
+def _calculate_consistency_metrics(per_rep_values: np.ndarray) -> tuple:
     """Calculates mean, std dev, and coefficient of variation."""
     if len(per_rep_values) < 2:
         return None, None, None
-    mean_val = sum(per_rep_values) / len(per_rep_values)
-    variance = sum((x - mean_val) ** 2 for x in per_rep_values) / len(per_rep_values)
-    std_dev = variance ** 0.5
+    values = np.asarray(per_rep_values, dtype=np.float64)
+    mean_val, std_dev = float(values.mean()), float(values.std())
     cv = (std_dev / mean_val * 100) if mean_val != 0 else None
     return mean_val, std_dev, cv
 
@@ -330,43 +311,48 @@ def _determine_grade(final_score: int) -> str:
         return "Needs Improvement"
 
 
-def _calculate_smoothed_baseline(angles: list, start_frame: int, window: int = 3) -> float:
-    """Calculates smoothed baseline from first few frames."""
-    valid = [angles[i] for i in range(start_frame, min(start_frame + window, len(angles)))
-             if i < len(angles) and angles[i] is not None]
-    return sum(valid) / len(valid) if valid else (angles[start_frame] if start_frame < len(angles) and angles[start_frame] is not None else 0)
+def _stack_angle_series(*series: list) -> tuple:
+    """Stacks per-frame angle lists into a NaN-padded (K, N) float64 array. Returns (array, lengths)."""
+    lengths = np.array([len(angles) for angles in series])
+    stacked = np.full((len(series), lengths.max(initial=0)), np.nan)
+    for row, angles in enumerate(series):
+        stacked[row, :len(angles)] = np.array(angles, dtype=np.float64)
+    return stacked, lengths
+
 
+def _calculate_smoothed_baseline(angles: np.ndarray, start_frame: int, window: int = 3) -> np.ndarray:
+    """Calculates a smoothed baseline per row from its first few frames (NaN = missing, 0 if none)."""
+    head = angles[:, start_frame:start_frame + window]
+    valid = ~np.isnan(head)
+    counts = valid.sum(axis=1)
+    sums = np.where(valid, head, 0.0).sum(axis=1)
+    return np.divide(sums, counts, out=np.zeros(len(angles)), where=counts > 0)
 
-def _detect_movement_start_velocity(angles: list, start_frame: int, end_frame: int, fps: float) -> int:
-    """Detects movement start using velocity (rate of change). Returns frame index."""
-    if start_frame >= len(angles) or end_frame >= len(angles) or end_frame <= start_frame:
-        return start_frame
+
+def _detect_movement_start_velocity(angles: np.ndarray, lengths: np.ndarray, start_frame: int, end_frame: int, fps: float) -> np.ndarray:
+    """Detects movement start for every row using velocity (rate of change). Returns frame indices."""
+    if end_frame <= start_frame or end_frame >= angles.shape[1]:
+        return np.full(len(angles), start_frame)
     baseline = _calculate_smoothed_baseline(angles, start_frame, 3)
-    velocity_threshold = 2.0 / fps
-    for i in range(start_frame + 1, min(end_frame + 1, len(angles))):
-        if angles[i] is not None and angles[i-1] is not None:
-            velocity = abs(angles[i] - angles[i-1]) * fps
-            if velocity >= velocity_threshold and abs(angles[i] - baseline) >= 3.0:
-                return i
-    return start_frame
+    segment = angles[:, start_frame:end_frame + 1]
+    velocity = np.abs(np.diff(segment, axis=1)) * fps
+    moved = (velocity >= 2.0 / fps) & (np.abs(segment[:, 1:] - baseline[:, None]) >= 3.0)
+    found = moved.any(axis=1) & (end_frame < lengths)
+    return np.where(found, start_frame + 1 + moved.argmax(axis=1), start_frame)
 
 
 def _calculate_glute_dominance_metrics(quad_angles: list, torso_angles: list, reps: list, fps: float) -> dict:
     """Calculates glute vs quad dominance metrics per rep during descent phase only."""
     if not reps or len(reps) < 1:
         return {"status": "error", "message": "No reps available for analysis"}
-    timing_diffs_ms = []
-    for rep in reps:
-        start = rep["start_frame"]
+    angles, lengths = _stack_angle_series(torso_angles, quad_angles)
+    timing_diffs_ms = np.empty(len(reps))
+    for k, rep in enumerate(reps):
         bottom = rep.get("bottom_frame", rep["end_frame"])
-        hip_start = _detect_movement_start_velocity(torso_angles, start, bottom, fps)
-        knee_start = _detect_movement_start_velocity(quad_angles, start, bottom, fps)
-        timing_diff_frames = hip_start - knee_start
-        timing_diff_ms = (timing_diff_frames / fps) * 1000
-        timing_diffs_ms.append(timing_diff_ms)
-    avg_timing_diff_ms = sum(timing_diffs_ms) / len(timing_diffs_ms) if timing_diffs_ms else 0
-    return {"avg_timing_diff_ms": round(avg_timing_diff_ms, 1),
-            "per_rep_diffs_ms": [round(d, 1) for d in timing_diffs_ms]}
+        hip_start, knee_start = _detect_movement_start_velocity(angles, lengths, rep["start_frame"], bottom, fps).tolist()
+        timing_diffs_ms[k] = ((hip_start - knee_start) / fps) * 1000
+    return {"avg_timing_diff_ms": round(float(timing_diffs_ms.mean()), 1),
+            "per_rep_diffs_ms": [round(d, 1) for d in timing_diffs_ms.tolist()]}
 
 
 def _determine_glute_dominance_status(avg_timing_diff_ms: float) -> tuple:
@@ -404,46 +390,38 @@ def _is_front_view(camera_angle_info: dict) -> bool:
     return abs(angle_estimate - 0) <= 10
 
 
-def _calculate_knee_valgus_angle(hip, knee, ankle) -> float:
-    """Calculates FPPA: angle at knee joint (hip-knee-ankle). 180° = neutral, <180° = valgus, >180° = varus."""
-    import math
-    vec1_x, vec1_y = hip.x - knee.x, hip.y - knee.y
-    vec2_x, vec2_y = ankle.x - knee.x, ankle.y - knee.y
-    dot = vec1_x * vec2_x + vec1_y * vec2_y
-    cross = vec1_x * vec2_y - vec1_y * vec2_x
-    mag1 = math.sqrt(vec1_x**2 + vec1_y**2)
-    mag2 = math.sqrt(vec2_x**2 + vec2_y**2)
-    if mag1 == 0 or mag2 == 0:
-        return None
-    cos_angle = dot / (mag1 * mag2)
-    cos_angle = max(-1.0, min(1.0, cos_angle))
-    angle_rad = math.acos(cos_angle)
-    if cross > 0:
-        angle_rad = 2 * math.pi - angle_rad
-    fppa = math.degrees(angle_rad)
-    return fppa
-
-
-def _calculate_valgus_per_frame(landmarks_list: list, reps: list) -> list:
-    """Calculates knee valgus (FPPA) for each frame during active squat phases."""
+def _knee_valgus_angles(hip: np.ndarray, knee: np.ndarray, ankle: np.ndarray) -> tuple:
+    """Calculates FPPA (angle at the knee, hip-knee-ankle) over (N, 2) arrays. 180° = neutral, <180° = valgus, >180° = varus.
+    Returns (angles in degrees, mask of frames where neither segment has zero length)."""
+    vec1, vec2 = hip - knee, ankle - knee
+    dot = (vec1 * vec2).sum(axis=-1)
+    cross = vec1[:, 0] * vec2[:, 1] - vec1[:, 1] * vec2[:, 0]
+    angle_rad = np.arctan2(np.abs(cross), dot)
+    angle_rad = np.where(cross > 0, 2 * np.pi - angle_rad, angle_rad)
+    return np.degrees(angle_rad), ~((dot == 0) & (cross == 0))
+
+
+def _active_frame_mask(frame_count: int, reps: list) -> np.ndarray:
+    """Boolean mask of frames that fall inside any rep."""
+    mask = np.zeros(frame_count, dtype=bool)
+    for rep in reps:
+        mask[rep["start_frame"]:rep["end_frame"] + 1] = True
+    return mask
+
+
+def _calculate_valgus_per_frame(landmarks_list: list, reps: list, landmarks_xy: tuple = None) -> list:
+    """Calculates knee valgus (FPPA) for each frame during active squat phases.
+    landmarks_xy is an optional (xy, mask) pair from landmarks_to_array covering landmarks 23-28."""
     if not landmarks_list or not reps:
         return []
-    valgus_angles = []
-    active_frames = set()
-    for rep in reps:
-        active_frames.update(range(rep["start_frame"], rep["end_frame"] + 1))
-    for i, landmarks in enumerate(landmarks_list):
-        if i not in active_frames or not landmarks:
-            valgus_angles.append(None)
-            continue
-        left_valgus = _calculate_knee_valgus_angle(landmarks.landmark[23], landmarks.landmark[25], landmarks.landmark[27])
-        right_valgus = _calculate_knee_valgus_angle(landmarks.landmark[24], landmarks.landmark[26], landmarks.landmark[28])
-        if left_valgus is not None and right_valgus is not None:
-            avg_fppa = (left_valgus + right_valgus) / 2
-            valgus_angles.append(avg_fppa)
-        else:
-            valgus_angles.append(None)
-    return valgus_angles
+    active = _active_frame_mask(len(landmarks_list), reps)
+    if landmarks_xy is None:
+        xy, packed = landmarks_to_array(landmarks_list, _VALGUS_LANDMARK_INDICES, active)
+    else:
+        xy, packed = landmarks_xy[0], landmarks_xy[1] & active
+    left, left_ok = _knee_valgus_angles(xy[:, 23], xy[:, 25], xy[:, 27])
+    right, right_ok = _knee_valgus_angles(xy[:, 24], xy[:, 26], xy[:, 28])
+    return to_optional_list((left + right) / 2, packed & left_ok & right_ok)
 
 
 def _calculate_valgus_metrics(valid_fppa: list) -> tuple:
@@ -459,28 +437,31 @@ def _calculate_valgus_metrics(valid_fppa: list) -> tuple:
     return max_fppa, avg_fppa, fppa_range, max_deviation_from_180, most_extreme_fppa
 
 
+_VALGUS_DEVIATION_THRESHOLDS = (4, 8)
+_GOOD_VALGUS_STATUS = ("good", 100, "Minimal knee valgus/varus detected. FPPA: {fppa:.1f}° (deviation from 180°: {deviation:.1f}°). Research indicates this is within safe range.")
+_VALGUS_STATUS_TABLE = {
+    (0, True): _GOOD_VALGUS_STATUS,
+    (0, False): _GOOD_VALGUS_STATUS,
+    (1, True): ("warning", 75, "Moderate knee valgus detected. FPPA: {fppa:.1f}° (deviation: {deviation:.1f}°). Research suggests this may increase injury risk. Focus on hip abductor and external rotator strength."),
+    (1, False): ("warning", 75, "Moderate knee varus detected. FPPA: {fppa:.1f}° (deviation: {deviation:.1f}°). While less commonly associated with ACL injuries than valgus, varus alignment may indicate biomechanical issues. Consider addressing movement patterns."),
+    (2, True): ("poor", 50, "Significant knee valgus detected. FPPA: {fppa:.1f}° (knee inward, deviation: {deviation:.1f}°). Research indicates valgus significantly increases risk of ACL and patellofemoral injuries. Address hip abductor and external rotator weakness, and improve movement patterns."),
+    (2, False): ("warning", 75, "Significant knee varus detected. FPPA: {fppa:.1f}° (knee outward, deviation: {deviation:.1f}°). While varus is less commonly associated with ACL injuries than valgus, significant varus may indicate biomechanical issues or compensation patterns. Consider addressing movement patterns and lower limb alignment."),
+}
+
+
 def _determine_valgus_status(max_fppa: float, avg_fppa: float, max_deviation: float, most_extreme_fppa: float) -> tuple:
-    """Determines status based on FPPA deviation from 180°. <180° = valgus, >180° = varus."""
-    if max_deviation < 4:
-        return "good", 100, f"Minimal knee valgus/varus detected. FPPA: {most_extreme_fppa:.1f}° (deviation from 180°: {max_deviation:.1f}°). Research indicates this is within safe range."
-    elif max_deviation < 8:
-        valgus_varus = "valgus" if most_extreme_fppa < 180 else "varus"
-        if most_extreme_fppa < 180:
-            return "warning", 75, f"Moderate knee valgus detected. FPPA: {most_extreme_fppa:.1f}° (deviation: {max_deviation:.1f}°). Research suggests this may increase injury risk. Focus on hip abductor and external rotator strength."
-        else:
-            return "warning", 75, f"Moderate knee varus detected. FPPA: {most_extreme_fppa:.1f}° (deviation: {max_deviation:.1f}°). While less commonly associated with ACL injuries than valgus, varus alignment may indicate biomechanical issues. Consider addressing movement patterns."
-    else:
-        if most_extreme_fppa < 180:
-            return "poor", 50, f"Significant knee valgus detected. FPPA: {most_extreme_fppa:.1f}° (knee inward, deviation: {max_deviation:.1f}°). Research indicates valgus significantly increases risk of ACL and patellofemoral injuries. Address hip abductor and external rotator weakness, and improve movement patterns."
-        else:
-            return "warning", 75, f"Significant knee varus detected. FPPA: {most_extreme_fppa:.1f}° (knee outward, deviation: {max_deviation:.1f}°). While varus is less commonly associated with ACL injuries than valgus, significant varus may indicate biomechanical issues or compensation patterns. Consider addressing movement patterns and lower limb alignment."
+    """Determines status based on FPPA deviation from 180°. <180° = valgus, >180° = varus.
+    Severity is the number of deviation thresholds reached; (severity, is_valgus) selects the message."""
+    severity = bisect_right(_VALGUS_DEVIATION_THRESHOLDS, max_deviation)
+    status, score, template = _VALGUS_STATUS_TABLE[(severity, most_extreme_fppa < 180)]
+    return status, score, template.format(fppa=most_extreme_fppa, deviation=max_deviation)
 
 
-def analyze_knee_valgus(landmarks_list: list, reps: list) -> dict:
+def analyze_knee_valgus(landmarks_list: list, reps: list, landmarks_xy: tuple = None) -> dict:
     """Analyzes knee valgus using FPPA. 180° = neutral, <180° = valgus, >180° = varus. Only valid for front view (0deg)."""
     if not landmarks_list or not reps:
         return {"status": "error", "message": "Missing landmarks or rep data"}
-    fppa_angles = _calculate_valgus_per_frame(landmarks_list, reps)
+    fppa_angles = _calculate_valgus_per_frame(landmarks_list, reps, landmarks_xy)
     valid_fppa = [f for f in fppa_angles if f is not None]
     if not valid_fppa:
         return {"status": "error", "message": "No valid FPPA data available"}
@@ -491,21 +472,21 @@ def analyze_knee_valgus(landmarks_list: list, reps: list) -> dict:
             "max_deviation_from_180": round(max_deviation, 1), "fppa_per_frame": fppa_angles}
 
 
+_SCORE_WEIGHTS = {"torso_angle": 0.25, "quad_angle": 0.25, "glute_dominance": 0.12,
+                  "rep_consistency": 0.18, "torso_asymmetry": 0.08, "quad_asymmetry": 0.07, "ankle_asymmetry": 0.05}
+_SCORE_WEIGHT_VALUES = np.array(list(_SCORE_WEIGHTS.values()))
+
+
 def calculate_final_score(form_analysis: dict) -> dict:
     """Calculates weighted final score: Torso 25%, Quad 25%, Glute/Quad Dominance 12%, Rep Consistency 18%, Torso Asymmetry 8%, Quad Asymmetry 7%, Ankle Asymmetry 5%."""
-    weights = {"torso_angle": 0.25, "quad_angle": 0.25, "glute_dominance": 0.12,
-               "rep_consistency": 0.18, "torso_asymmetry": 0.08, "quad_asymmetry": 0.07, "ankle_asymmetry": 0.05}
-    weighted_sum = 0.0
-    total_weight = 0.0
     component_scores = {}
-    for key, weight in weights.items():
+    for key in _SCORE_WEIGHTS:
         analysis = form_analysis.get(key)
         if analysis and analysis.get("score") is not None:
-            score = analysis["score"]
-            weighted_sum += score * weight
-            total_weight += weight
-            component_scores[key] = score
-    final_score = int(weighted_sum / total_weight) if total_weight > 0 else 0
+            component_scores[key] = analysis["score"]
+    scores = np.array([component_scores.get(key, np.nan) for key in _SCORE_WEIGHTS], dtype=np.float64)
+    present = ~np.isnan(scores)
+    total_weight = _SCORE_WEIGHT_VALUES[present].sum()
+    final_score = int((scores[present] * _SCORE_WEIGHT_VALUES[present]).sum() / total_weight) if total_weight > 0 else 0
     return {"final_score": final_score, "grade": _determine_grade(final_score),
-            "component_scores": component_scores, "weights": weights}
-
+            "component_scores": component_scores, "weights": dict(_SCORE_WEIGHTS)}
@@ -4,6 +4,12 @@ Validates MediaPipe pose landmarks for single frames and batches
 """
 
 import math
+from operator import attrgetter
+import numpy as np
+
+_FLOAT64_EXPONENT_MASK = np.uint64(0x7FF0000000000000)
+_LANDMARK_XY = attrgetter('x', 'y')
+_ABSENT_XY = (None, None)
 
 
 def _is_valid_coordinate(value: float) -> bool:
@@ -29,59 +35,53 @@ def validate_single_landmark(landmark) -> bool:
     return _is_valid_landmark_coords(landmark)
 
 
-def _check_landmark_exists(landmarks, index: int) -> bool:
-    """Checks if landmark at index exists and is accessible."""
-    if not landmarks or not hasattr(landmarks, 'landmark'):
-        return False
-    try:
-        landmark = landmarks.landmark[index]
-        return validate_single_landmark(landmark)
-    except (IndexError, AttributeError):
-        return False
+def _required_xy(points, required: list) -> list:
+    """Returns (x, y) for each required index of a frame's landmark list, (None, None) where absent."""
+    xy = []
+    for idx in required:
+        try:
+            xy.append(_LANDMARK_XY(points[idx]))
+        except (IndexError, AttributeError):
+            xy.append(_ABSENT_XY)
+    return xy
 
 
-def _get_missing_landmarks(landmarks, required: list) -> list:
-    """Returns list of missing required landmark indices."""
+def _get_missing_landmarks(points, required: list) -> list:
+    """Returns list of missing required landmark indices in a single pass over the required points."""
     missing = []
-    for idx in required:
-        if not _check_landmark_exists(landmarks, idx):
+    for idx, (x, y) in zip(required, _required_xy(points, required)):
+        if x is None or y is None or not (math.isfinite(x) and math.isfinite(y)):
             missing.append(idx)
     return missing
 
 
-def _calculate_validation_score(landmarks, required: list) -> float:
-    """Calculates validation score (0.0-1.0) based on required landmarks."""
+def _calculate_validation_score(landmarks, required: list, missing: list) -> float:
+    """Calculates validation score (0.0-1.0) from the already computed missing landmarks."""
     if not required:
         return 1.0 if landmarks else 0.0
-    missing_count = len(_get_missing_landmarks(landmarks, required))
-    return max(0.0, 1.0 - (missing_count / len(required)))
+    return max(0.0, 1.0 - (len(missing) / len(required)))
 
 
-def validate_frame_landmarks(landmarks, required_landmarks=None) -> dict:
-    """
-    Validates a single frame's landmarks.
-    Returns validation result with is_valid, missing landmarks, and score.
-    """
-    has_pose = landmarks is not None and hasattr(landmarks, 'landmark')
-    if not has_pose:
-        return {
-            "is_valid": False,
-            "has_pose": False,
-            "missing_landmarks": required_landmarks or [],
-            "invalid_landmarks": [],
-            "validation_score": 0.0,
-            "errors": ["No pose detected in frame"],
-            "warnings": []
-        }
-    required = required_landmarks or []
-    missing = _get_missing_landmarks(landmarks, required)
-    score = _calculate_validation_score(landmarks, required)
-    is_valid = len(missing) == 0
+def _no_pose_result(required_landmarks) -> dict:
+    """Builds the per-frame result for a frame without a detected pose."""
+    return {
+        "is_valid": False,
+        "has_pose": False,
+        "missing_landmarks": required_landmarks or [],
+        "invalid_landmarks": [],
+        "validation_score": 0.0,
+        "errors": ["No pose detected in frame"],
+        "warnings": []
+    }
+
+
+def _pose_result(missing: list, score: float) -> dict:
+    """Builds the per-frame result for a detected pose."""
     errors = []
     if missing:
         errors.append(f"Missing landmarks: {missing}")
     return {
-        "is_valid": is_valid,
+        "is_valid": len(missing) == 0,
         "has_pose": True,
         "missing_landmarks": missing,
         "invalid_landmarks": [],
@@ -91,39 +91,75 @@ def validate_frame_landmarks(landmarks, required_landmarks=None) -> dict:
     }
 
 
-def validate_landmarks_batch(landmarks_list: list, required_landmarks=None) -> dict:
+def validate_frame_landmarks(landmarks, required_landmarks=None) -> dict:
     """
-    Validates multiple frames' landmarks and returns aggregate statistics.
-    Returns batch-level validation result with percentages and recommendations.
+    Validates a single frame's landmarks.
+    Returns validation result with is_valid, missing landmarks, and score.
     """
-    if not landmarks_list:
-        return {
-            "overall_valid": False,
-            "valid_frame_count": 0,
-            "total_frame_count": 0,
-            "valid_frame_percentage": 0.0,
-            "per_frame_results": [],
-            "missing_critical_frames": [],
-            "quality_score": 0.0,
-            "errors": ["No landmarks provided"],
-            "warnings": [],
-            "recommendation": "No video frames to validate"
-        }
-    per_frame_results = []
-    valid_count = 0
-    missing_critical = []
-    total_score = 0.0
+    points = getattr(landmarks, 'landmark', None)
+    if points is None:
+        return _no_pose_result(required_landmarks)
+    required = required_landmarks or []
+    missing = _get_missing_landmarks(points, required)
+    return _pose_result(missing, _calculate_validation_score(landmarks, required, missing))
+
+
+def _stack_required_xy(landmarks_list: list, required: list) -> tuple:
+    """
+    Packs required landmark x/y for all frames into one (frames, required, 2) float array.
+    Absent landmarks and coordinates become NaN. Returns (coords, has_pose mask).
+    """
+    coords = np.full((len(landmarks_list), len(required), 2), np.nan)
+    has_pose = np.zeros(len(landmarks_list), dtype=bool)
     for i, landmarks in enumerate(landmarks_list):
-        frame_result = validate_frame_landmarks(landmarks, required_landmarks)
-        per_frame_results.append(frame_result)
-        if frame_result["is_valid"]:
-            valid_count += 1
-        elif required_landmarks:
-            missing_critical.append(i)
-        total_score += frame_result["validation_score"]
-    total_frames = len(landmarks_list)
-    valid_percentage = (valid_count / total_frames) if total_frames > 0 else 0.0
-    quality_score = (total_score / total_frames) if total_frames > 0 else 0.0
+        points = getattr(landmarks, 'landmark', None)
+        if points is None:
+            continue
+        has_pose[i] = True
+        if required:
+            coords[i] = _required_xy(points, required)
+    return coords, has_pose
+
+
+def _non_finite_points(coords: np.ndarray) -> np.ndarray:
+    """
+    Flags points whose x or y is NaN or Inf, i.e. has every float64 exponent bit set.
+    One masked compare on the raw bits replaces separate isnan/isinf passes.
+    """
+    exponent = coords.view(np.uint64) & _FLOAT64_EXPONENT_MASK
+    return (exponent == _FLOAT64_EXPONENT_MASK).any(axis=2)
+
+
+def _build_per_frame_results(invalid, has_pose, scores, required_landmarks) -> list:
+    """Materializes validate_frame_landmarks-equivalent dicts from the batch masks."""
+    required = required_landmarks or []
+    missing_any = invalid.any(axis=1).tolist()
+    results = []
+    for i, posed in enumerate(has_pose.tolist()):
+        if not posed:
+            results.append(_no_pose_result(required_landmarks))
+            continue
+        missing = [required[j] for j in np.flatnonzero(invalid[i]).tolist()] if missing_any[i] else []
+        results.append(_pose_result(missing, scores[i]))
+    return results
+
+
+def _score_frames(landmarks_list: list, required_landmarks) -> tuple:
+    """Returns (invalid point mask, has_pose mask, per-frame scores list) for a non-empty batch."""
+    required = required_landmarks or []
+    coords, has_pose = _stack_required_xy(landmarks_list, required)
+    invalid = _non_finite_points(coords)
+    missing_counts = invalid.sum(axis=1)
+    frame_scores = 1.0 - missing_counts / len(required) if required else np.ones(len(landmarks_list))
+    return invalid, has_pose, np.where(has_pose, frame_scores, 0.0).tolist()
+
+
+def _summarize_batch(invalid, has_pose, scores: list, required_landmarks) -> dict:
+    """Builds the aggregate batch result (everything except per_frame_results)."""
+    valid = has_pose & ~invalid.any(axis=1)
+    valid_count = int(valid.sum())
+    total_frames = len(scores)
+    valid_percentage = valid_count / total_frames
     overall_valid = valid_percentage >= 0.3
     errors = []
     warnings = []
@@ -137,11 +173,54 @@ def validate_landmarks_batch(landmarks_list: list, required_landmarks=None) -> d
         "valid_frame_count": valid_count,
         "total_frame_count": total_frames,
         "valid_frame_percentage": valid_percentage,
-        "per_frame_results": per_frame_results,
-        "missing_critical_frames": missing_critical,
-        "quality_score": quality_score,
+        "valid_frame_mask": valid.tolist(),
+        "missing_critical_frames": np.flatnonzero(~valid).tolist() if required_landmarks else [],
+        "quality_score": sum(scores) / total_frames,
         "errors": errors,
         "warnings": warnings,
         "recommendation": recommendation
     }
 
+
+def _empty_batch_result() -> dict:
+    """Returns the batch result for an empty landmarks list."""
+    return {
+        "overall_valid": False,
+        "valid_frame_count": 0,
+        "total_frame_count": 0,
+        "valid_frame_percentage": 0.0,
+        "valid_frame_mask": [],
+        "missing_critical_frames": [],
+        "quality_score": 0.0,
+        "errors": ["No landmarks provided"],
+        "warnings": [],
+        "recommendation": "No video frames to validate"
+    }
+
+
+def validate_landmarks_batch_summary(landmarks_list: list, required_landmarks=None) -> dict:
+    """
+    Validates multiple frames' landmarks and returns only the aggregate statistics.
+    Same result as validate_landmarks_batch minus per_frame_results, so no per-frame dicts are built.
+    """
+    if not landmarks_list:
+        return _empty_batch_result()
+    invalid, has_pose, scores = _score_frames(landmarks_list, required_landmarks)
+    return _summarize_batch(invalid, has_pose, scores, required_landmarks)
+
+
+def validate_landmarks_batch(landmarks_list: list, required_landmarks=None) -> dict:
+    """
+    Validates multiple frames' landmarks and returns aggregate statistics.
+    Returns batch-level validation result with percentages and recommendations.
+    valid_frame_mask holds each frame's is_valid flag so consumers need not re-walk per_frame_results.
+    Required x/y for all frames are packed into one array so NaN/Inf checks run vectorized.
+    """
+    if not landmarks_list:
+        result = _empty_batch_result()
+        result["per_frame_results"] = []
+        return result
+    invalid, has_pose, scores = _score_frames(landmarks_list, required_landmarks)
+    result = _summarize_batch(invalid, has_pose, scores, required_landmarks)
+    result["per_frame_results"] = _build_per_frame_results(invalid, has_pose, scores, required_landmarks)
+    return result
@@ -1,220 +1,342 @@
 """
 Pose estimation component - shared across all exercises
 Detects body parts and keypoints from video frames
+MediaPipe is imported on first inference, so importing this module (e.g. for drawing) stays cheap.
 """
 
-import mediapipe as mp
+import os
+import queue
+import threading
 import cv2
 import math
+import numpy as np
+from src.shared.upload_video.upload_video import iter_video_frames, retain_frames
+from src.shared.upload_video.video_validation import track_frame_quality, summarize_frame_validation
+
+
+# Mean absolute difference (0-255 scale) between 32x32 grayscale thumbnails below which a frame
+# reuses the previous frame's landmarks instead of running MediaPipe. Set to 0 to disable.
+POSE_REUSE_DIFF_THRESHOLD = float(os.environ.get("POSE_REUSE_DIFF_THRESHOLD", "1.0"))
+# Number of decoded, color-converted frames buffered ahead of MediaPipe inference.
+POSE_PREFETCH_DEPTH = 4
+# Path to a MediaPipe Tasks pose_landmarker .task model. When set, inference uses the Tasks API
+# (which supports the GPU delegate) instead of mp.solutions.pose.
+POSE_LANDMARKER_MODEL = os.environ.get("POSE_LANDMARKER_MODEL")
+# Tasks API delegate, "GPU" or "CPU"; GPU falls back to CPU when the device cannot be initialized.
+POSE_LANDMARKER_DELEGATE = os.environ.get("POSE_LANDMARKER_DELEGATE", "GPU")
+# Tasks VIDEO mode needs increasing timestamps; frames are stamped at a nominal 30 fps.
+_TASKS_FRAME_INTERVAL_MS = 33
+_END_OF_FRAMES = object()
+_QUAD_LANDMARK_INDICES = (23, 24, 25, 26)
+_DEFAULT_STATUS_COLOR = (255, 255, 255)
+_LANDMARK_COLOR = (0, 255, 0)
+_STATUS_COLORS = {"good": (255, 255, 255), "warning": (0, 165, 255), "poor": (0, 0, 255)}
+
+
+def _frame_thumbnail(frame) -> np.ndarray:
+    """Downscales frame to a 32x32 grayscale thumbnail for cheap frame-to-frame comparison."""
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+
+def _iter_prepared_frames(frames, reuse_threshold: float):
+    """Yields (rgb_frame, thumbnail) per BGR frame; thumbnail is None when landmark reuse is disabled."""
+    for frame in frames:
+        thumb = _frame_thumbnail(frame) if reuse_threshold > 0 else None
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), thumb
+
+
+def _put_unless_stopped(buffer: queue.Queue, item, stop: threading.Event) -> bool:
+    """Puts item on buffer, giving up if stop is set while waiting. Returns True if queued."""
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce_items(items, buffer: queue.Queue, stop: threading.Event):
+    """Producer thread body: queues (item, None) entries, then (end marker, error or None)."""
+    try:
+        for item in items:
+            if not _put_unless_stopped(buffer, (item, None), stop):
+                return
+        _put_unless_stopped(buffer, (_END_OF_FRAMES, None), stop)
+    except Exception as e:
+        _put_unless_stopped(buffer, (_END_OF_FRAMES, e), stop)
+    finally:
+        if hasattr(items, "close"):
+            items.close()
+
+
+def _prefetch(items, depth: int):
+    """
+    Iterates items on a background thread, keeping up to depth results buffered.
+    Lets decode and color conversion (which release the GIL) overlap with pose inference.
+    Producer errors are re-raised in the consumer.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce_items, args=(items, buffer, stop), daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _END_OF_FRAMES:
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def _open_solutions_detector() -> tuple:
+    """Returns (detect, close) backed by mp.solutions.pose (CPU)."""
+    import mediapipe as mp
+    pose = mp.solutions.pose.Pose()
+    return (lambda rgb_frame, frame_index: pose.process(rgb_frame).pose_landmarks), pose.close
+
+
+def _create_pose_landmarker(delegate):
+    """Creates a Tasks API PoseLandmarker in VIDEO mode for POSE_LANDMARKER_MODEL on the given delegate."""
+    from mediapipe.tasks import python as mp_python
+    from mediapipe.tasks.python import vision
+    options = vision.PoseLandmarkerOptions(
+        base_options=mp_python.BaseOptions(model_asset_path=POSE_LANDMARKER_MODEL, delegate=delegate),
+        running_mode=vision.RunningMode.VIDEO
+    )
+    return vision.PoseLandmarker.create_from_options(options)
+
+
+def _to_landmark_list(task_landmarks):
+    """Converts one Tasks API pose into the NormalizedLandmarkList that mp.solutions.pose returns."""
+    from mediapipe.framework.formats import landmark_pb2
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility or 0.0,
+                                        presence=lm.presence or 0.0)
+        for lm in task_landmarks
+    ])
+
+
+def _open_tasks_detector() -> tuple:
+    """Returns (detect, close) backed by the Tasks API PoseLandmarker, preferring POSE_LANDMARKER_DELEGATE."""
+    import mediapipe as mp
+    from mediapipe.tasks import python as mp_python
+    cpu = mp_python.BaseOptions.Delegate.CPU
+    delegate = getattr(mp_python.BaseOptions.Delegate, POSE_LANDMARKER_DELEGATE.upper(), cpu)
+    try:
+        landmarker = _create_pose_landmarker(delegate)
+    except RuntimeError:
+        if delegate == cpu:
+            raise
+        landmarker = _create_pose_landmarker(cpu)
+
+    def detect(rgb_frame, frame_index):
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        result = landmarker.detect_for_video(image, frame_index * _TASKS_FRAME_INTERVAL_MS)
+        return _to_landmark_list(result.pose_landmarks[0]) if result.pose_landmarks else None
+    return detect, landmarker.close
+
+
+def _open_pose_detector() -> tuple:
+    """Returns (detect(rgb_frame, frame_index) -> landmarks or None, close) for the configured backend."""
+    return _open_tasks_detector() if POSE_LANDMARKER_MODEL else _open_solutions_detector()
+
+
+def _iter_pose_landmarks(detect, prepared_frames, reuse_threshold: float):
+    """Yields pose landmarks per prepared frame, reusing the last inference for near-duplicate frames."""
+    last_thumb, last_landmarks = None, None
+    for frame_index, (rgb_frame, thumb) in enumerate(prepared_frames):
+        if last_thumb is not None and np.mean(np.abs(thumb - last_thumb)) < reuse_threshold:
+            yield last_landmarks
+            continue
+        last_thumb, last_landmarks = thumb, detect(rgb_frame, frame_index)
+        yield last_landmarks
 
 
 def process_frames_with_pose(frames: list, validate: bool = False, required_landmarks: list = None) -> tuple:
     """
     Processes frames with MediaPipe Pose to extract keypoints.
-    Returns landmarks list and optionally validation result.
+    Accepts a list or any iterable of frames (e.g. a decoding generator).
+    Frames nearly identical to the last inferred frame reuse its landmarks (see POSE_REUSE_DIFF_THRESHOLD).
+    Decoding and color conversion run on a prefetch thread so they overlap with inference.
+    Set POSE_LANDMARKER_MODEL to run inference through the Tasks API (GPU delegate when available).
+    Returns landmarks list and optionally the aggregate validation summary (no per_frame_results).
     """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose()
-    results = []
-    
-    for frame in frames:
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = pose.process(rgb_frame)
-        results.append(result.pose_landmarks)
-    
-    pose.close()
+    detect, close = _open_pose_detector()
+    prepared_frames = _prefetch(_iter_prepared_frames(frames, POSE_REUSE_DIFF_THRESHOLD), POSE_PREFETCH_DEPTH)
+    try:
+        results = list(_iter_pose_landmarks(detect, prepared_frames, POSE_REUSE_DIFF_THRESHOLD))
+    finally:
+        # Stops and joins the prefetch thread (releasing the capture) even when detect raises
+        prepared_frames.close()
+        close()
     if validate:
-        from src.shared.pose_estimation.landmark_validation import validate_landmarks_batch
-        validation_result = validate_landmarks_batch(results, required_landmarks)
+        from src.shared.pose_estimation.landmark_validation import validate_landmarks_batch_summary
+        validation_result = validate_landmarks_batch_summary(results, required_landmarks)
         return results, validation_result
     return results, None
 
 
+def process_video_streaming_pose(video_path: str, validate: bool = False, required_landmarks: list = None,
+                                 frame_cache: dict = None) -> tuple:
+    """
+    Decodes a video file frame by frame straight into pose estimation, never holding decoded frames.
+    Frame quality is tallied on the fly instead of validating a materialized frame list.
+    With frame_cache (see retain_frames) decoded frames are also kept, within its byte budget, for later annotation.
+    Returns tuple of (landmarks list, landmark validation result or None, frame validation result).
+    """
+    frame_tally = {"frame_count": 0, "corrupted_count": 0}
+    frames = track_frame_quality(iter_video_frames(video_path, reuse_buffer=True), frame_tally)
+    if frame_cache is not None:
+        frames = retain_frames(frames, frame_cache)
+    landmarks_list, validation_result = process_frames_with_pose(frames, validate, required_landmarks)
+    return landmarks_list, validation_result, summarize_frame_validation(**frame_tally)
+
+
+def _angle_from_horizontal(point1, point2) -> float:
+    """Returns the angle of the point1 -> point2 segment from horizontal in [0, 360) degrees."""
+    return math.degrees(math.atan2(-(point2.y - point1.y), point2.x - point1.x)) % 360
+
+
 def _get_segment_angle(point1, point2) -> float:
     """Calculates angle of segment from vertical. Matches calculation.py logic."""
-    dx = point2.x - point1.x
-    dy = point2.y - point1.y
-    angle_from_horizontal = math.degrees(math.atan2(-dy, dx))
-    if angle_from_horizontal < 0:
-        angle_from_horizontal += 360
-    if angle_from_horizontal <= 90:
-        return 90 - angle_from_horizontal
-    elif angle_from_horizontal <= 180:
-        return angle_from_horizontal - 90
-    elif angle_from_horizontal <= 270:
-        return 270 - angle_from_horizontal
-    else:
-        return angle_from_horizontal - 270
+    return abs(_angle_from_horizontal(point1, point2) % 180 - 90)
 
 
 def _get_ankle_segment_angle(point1, point2) -> float:
     """Calculates ankle angle from heel to knee. Matches calculation.py logic."""
-    dx = point2.x - point1.x
-    dy = point2.y - point1.y
-    angle_from_horizontal = math.degrees(math.atan2(-dy, dx))
-    if angle_from_horizontal < 0:
-        angle_from_horizontal += 360
-    if angle_from_horizontal <= 90:
-        return angle_from_horizontal
-    elif angle_from_horizontal <= 180:
-        return 180 - angle_from_horizontal
-    elif angle_from_horizontal <= 270:
-        return 270 - angle_from_horizontal
-    else:
-        return 360 - angle_from_horizontal
+    angle = _angle_from_horizontal(point1, point2)
+    if angle <= 180:
+        return angle if angle <= 90 else 180 - angle
+    return (270 - angle) % 90
 
 
 def _get_status_color(status: str) -> tuple:
     """Returns BGR color tuple for status: good=white, warning=orange, poor=red."""
-    if status == "good":
-        return (255, 255, 255)
-    elif status == "warning":
-        return (0, 165, 255)
-    elif status == "poor":
-        return (0, 0, 255)
-    return (255, 255, 255)
-
-
-def _determine_worse_side_torso(landmarks, frame_status: dict) -> str:
-    """Determines which side is worse for torso asymmetry. Returns 'left', 'right', or None."""
-    asymmetry_status = frame_status.get("torso_asymmetry")
-    if asymmetry_status not in ["warning", "poor"]:
-        return None
-    
-    if (len(landmarks.landmark) <= 24 or
-        not all(landmarks.landmark[i] for i in [11, 12, 23, 24])):
-        return None
-    
-    left_angle = _get_segment_angle(landmarks.landmark[23], landmarks.landmark[11])
-    right_angle = _get_segment_angle(landmarks.landmark[24], landmarks.landmark[12])
-    
-    if left_angle is None or right_angle is None:
-        return None
-    
-    asymmetry_value = right_angle - left_angle
-    return "right" if asymmetry_value > 0 else "left" if asymmetry_value < 0 else None
+    return _STATUS_COLORS.get(status, _DEFAULT_STATUS_COLOR)
 
 
-def _determine_worse_side_quad(landmarks, frame_status: dict) -> str:
-    """Determines which side is worse for quad asymmetry. Returns 'left', 'right', or None."""
-    asymmetry_status = frame_status.get("quad_asymmetry")
-    if asymmetry_status not in ["warning", "poor"]:
-        return None
-    
-    if (len(landmarks.landmark) <= 26 or
-        not all(landmarks.landmark[i] for i in [23, 24, 25, 26])):
+def _determine_worse_side(points, status: str, angle_fn, left_pair: tuple, right_pair: tuple) -> str:
+    """Determines which side is worse for an asymmetry metric. Returns 'left', 'right', or None."""
+    if status not in ("warning", "poor"):
         return None
-    
-    left_angle = _get_segment_angle(landmarks.landmark[23], landmarks.landmark[25])
-    right_angle = _get_segment_angle(landmarks.landmark[24], landmarks.landmark[26])
-    
-    if left_angle is None or right_angle is None:
+    indices = (*left_pair, *right_pair)
+    if len(points) <= max(indices) or not all(points[i] for i in indices):
         return None
-    
-    asymmetry_value = right_angle - left_angle
+    asymmetry_value = (angle_fn(points[right_pair[0]], points[right_pair[1]])
+                       - angle_fn(points[left_pair[0]], points[left_pair[1]]))
     return "right" if asymmetry_value > 0 else "left" if asymmetry_value < 0 else None
 
 
-def _determine_worse_side_ankle(landmarks, frame_status: dict) -> str:
-    """Determines which side is worse for ankle asymmetry. Returns 'left', 'right', or None."""
-    asymmetry_status = frame_status.get("ankle_asymmetry")
-    if asymmetry_status not in ["warning", "poor"]:
-        return None
-    
-    if (len(landmarks.landmark) <= 30 or
-        not all(landmarks.landmark[i] for i in [25, 26, 29, 30])):
-        return None
-    
-    left_angle = _get_ankle_segment_angle(landmarks.landmark[29], landmarks.landmark[25])
-    right_angle = _get_ankle_segment_angle(landmarks.landmark[30], landmarks.landmark[26])
-    
-    if left_angle is None or right_angle is None:
-        return None
-    
-    asymmetry_value = right_angle - left_angle
-    return "right" if asymmetry_value > 0 else "left" if asymmetry_value < 0 else None
+# (status key, segment angle fn, left segment, right segment, left marker, right marker) per asymmetry metric;
+# the worse side's marker landmark is recolored by status.
+_ASYMMETRY_MARKERS = (
+    ("torso_asymmetry", _get_segment_angle, (23, 11), (24, 12), 11, 12),
+    ("quad_asymmetry", _get_segment_angle, (23, 25), (24, 26), 25, 26),
+    ("ankle_asymmetry", _get_ankle_segment_angle, (29, 25), (30, 26), 29, 30),
+)
+
 
+def _landmark_pixels(points, indices, w: int, h: int) -> dict:
+    """Returns {index: (x, y) pixel tuple} for each requested landmark that exists, reading each one once."""
+    pixels = {}
+    count = len(points)
+    for idx in indices:
+        if idx in pixels or idx >= count:
+            continue
+        lm = points[idx]
+        if lm:
+            pixels[idx] = (int(lm.x * w), int(lm.y * h))
+    return pixels
 
-def _draw_torso_segment(annotated, landmarks, h: int, w: int, frame_status: dict = None):
+
+def _draw_torso_segment(annotated, points, h: int, w: int, frame_status: dict = None):
     """Draws torso segment (shoulder midpoint to hip midpoint) with color-coding."""
-    if (len(landmarks.landmark) <= 24 or
-        not all(landmarks.landmark[i] for i in [11, 12, 23, 24])):
+    if len(points) <= 24 or not all(points[i] for i in (11, 12, 23, 24)):
         return
     
-    shoulder_mid_x = int((landmarks.landmark[11].x + landmarks.landmark[12].x) / 2 * w)
-    shoulder_mid_y = int((landmarks.landmark[11].y + landmarks.landmark[12].y) / 2 * h)
-    hip_mid_x = int((landmarks.landmark[23].x + landmarks.landmark[24].x) / 2 * w)
-    hip_mid_y = int((landmarks.landmark[23].y + landmarks.landmark[24].y) / 2 * h)
+    shoulder_l, shoulder_r, hip_l, hip_r = points[11], points[12], points[23], points[24]
+    shoulder_mid = (int((shoulder_l.x + shoulder_r.x) / 2 * w), int((shoulder_l.y + shoulder_r.y) / 2 * h))
+    hip_mid = (int((hip_l.x + hip_r.x) / 2 * w), int((hip_l.y + hip_r.y) / 2 * h))
     
     torso_status = frame_status.get("torso_angle") if frame_status else None
     torso_color = _get_status_color(torso_status)
     
-    cv2.line(annotated, (shoulder_mid_x, shoulder_mid_y), (hip_mid_x, hip_mid_y), torso_color, 2)
+    cv2.line(annotated, shoulder_mid, hip_mid, torso_color, 2)
 
 
-def _draw_quad_segments(annotated, landmarks, h: int, w: int, frame_status: dict = None):
+def _draw_quad_segments(annotated, pixels: dict, frame_status: dict = None):
     """Draws left and right quad segments (hip to knee) with color-coding."""
     quad_status = frame_status.get("quad_angle") if frame_status else None
     quad_color = _get_status_color(quad_status)
     
-    if (len(landmarks.landmark) > 25 and
-        landmarks.landmark[23] and landmarks.landmark[25]):
-        left_hip_x = int(landmarks.landmark[23].x * w)
-        left_hip_y = int(landmarks.landmark[23].y * h)
-        left_knee_x = int(landmarks.landmark[25].x * w)
-        left_knee_y = int(landmarks.landmark[25].y * h)
-        cv2.line(annotated, (left_hip_x, left_hip_y), (left_knee_x, left_knee_y), quad_color, 2)
-    
-    if (len(landmarks.landmark) > 26 and
-        landmarks.landmark[24] and landmarks.landmark[26]):
-        right_hip_x = int(landmarks.landmark[24].x * w)
-        right_hip_y = int(landmarks.landmark[24].y * h)
-        right_knee_x = int(landmarks.landmark[26].x * w)
-        right_knee_y = int(landmarks.landmark[26].y * h)
-        cv2.line(annotated, (right_hip_x, right_hip_y), (right_knee_x, right_knee_y), quad_color, 2)
+    for hip, knee in ((23, 25), (24, 26)):
+        if hip in pixels and knee in pixels:
+            cv2.line(annotated, pixels[hip], pixels[knee], quad_color, 2)
 
 
-def _get_landmark_colors(landmarks, frame_status: dict, landmark_indices: list) -> dict:
+def _get_landmark_colors(points: list, frame_status: dict, landmark_indices: list) -> dict:
     """Returns color dict for each landmark index based on asymmetry status."""
-    colors = {}
-    default_green = (0, 255, 0)
-    
-    for idx in landmark_indices:
-        colors[idx] = default_green
-    
+    colors = dict.fromkeys(landmark_indices, _LANDMARK_COLOR)
     if not frame_status:
         return colors
     
-    worse_torso_side = _determine_worse_side_torso(landmarks, frame_status)
-    worse_quad_side = _determine_worse_side_quad(landmarks, frame_status)
-    worse_ankle_side = _determine_worse_side_ankle(landmarks, frame_status)
-    
-    torso_status = frame_status.get("torso_asymmetry")
-    quad_status = frame_status.get("quad_asymmetry")
-    ankle_status = frame_status.get("ankle_asymmetry")
-    
-    if worse_torso_side and torso_status in ["warning", "poor"]:
-        color = _get_status_color(torso_status)
-        if worse_torso_side == "left":
-            colors[11] = color
-        else:
-            colors[12] = color
-    
-    if worse_quad_side and quad_status in ["warning", "poor"]:
-        color = _get_status_color(quad_status)
-        if worse_quad_side == "left":
-            colors[25] = color
-        else:
-            colors[26] = color
+    for status_key, angle_fn, left_pair, right_pair, left_idx, right_idx in _ASYMMETRY_MARKERS:
+        status = frame_status.get(status_key)
+        worse_side = _determine_worse_side(points, status, angle_fn, left_pair, right_pair)
+        if worse_side:
+            colors[left_idx if worse_side == "left" else right_idx] = _get_status_color(status)
+    return colors
+
+
+def draw_landmarks_on_frame(annotated, landmarks, landmark_indices: list, frame_status: dict = None):
+    """
+    Draws segments and color-coded landmarks for one frame onto annotated, in place.
+    Landmarks are snapshotted into a plain list once, so helpers index a list instead of the protobuf
+    repeated field; pixel coordinates are computed once and shared by the quad segments and circles.
+    """
+    if not landmarks:
+        return annotated
+    h, w, _ = annotated.shape
+    points = list(landmarks.landmark)
+    pixels = _landmark_pixels(points, (*landmark_indices, *_QUAD_LANDMARK_INDICES), w, h)
+    _draw_torso_segment(annotated, points, h, w, frame_status)
+    _draw_quad_segments(annotated, pixels, frame_status)
     
-    if worse_ankle_side and ankle_status in ["warning", "poor"]:
-        color = _get_status_color(ankle_status)
-        if worse_ankle_side == "left":
-            colors[29] = color
-        else:
-            colors[30] = color
+    if not frame_status:
+        # No asymmetry status (plain replay): every landmark is drawn in the default color.
+        for idx in landmark_indices:
+            if idx in pixels:
+                cv2.circle(annotated, pixels[idx], 5, _LANDMARK_COLOR, -1)
+        return annotated
     
-    return colors
+    colors = _get_landmark_colors(points, frame_status, landmark_indices)
+    for idx in landmark_indices:
+        if idx in pixels:
+            cv2.circle(annotated, pixels[idx], 5, colors.get(idx, _LANDMARK_COLOR), -1)
+    return annotated
+
+
+def iter_annotated_frames(frames, landmarks_list: list, landmark_indices: list,
+                          per_frame_status: dict = None, copy_frames: bool = True):
+    """
+    Yields annotated frames one at a time, pairing each frame with its landmarks.
+    Accepts any iterable of frames so callers can stream decode -> annotate -> write.
+    With copy_frames=False drawing happens in place, for frames that are disposable decode buffers.
+    Frames without landmarks are yielded as-is, since nothing is drawn on them.
+    """
+    for frame_idx, (frame, landmarks) in enumerate(zip(frames, landmarks_list)):
+        if not landmarks:
+            yield frame
+            continue
+        annotated = frame.copy() if copy_frames else frame
+        frame_status = per_frame_status.get(frame_idx) if per_frame_status else None
+        yield draw_landmarks_on_frame(annotated, landmarks, landmark_indices, frame_status)
 
 
 def draw_landmarks_on_frames(frames: list, landmarks_list: list, 
@@ -233,23 +355,4 @@ def draw_landmarks_on_frames(frames: list, landmarks_list: list,
     Returns:
         List of annotated frames with landmarks drawn
     """
-    annotated_frames = []
-    for frame_idx, (frame, landmarks) in enumerate(zip(frames, landmarks_list)):
-        annotated = frame.copy()
-        if landmarks:
-            h, w, _ = frame.shape
-            frame_status = per_frame_status.get(frame_idx) if per_frame_status else None
-            
-            _draw_torso_segment(annotated, landmarks, h, w, frame_status)
-            _draw_quad_segments(annotated, landmarks, h, w, frame_status)
-            
-            colors = _get_landmark_colors(landmarks, frame_status, landmark_indices)
-            
-            for idx in landmark_indices:
-                if idx < len(landmarks.landmark) and landmarks.landmark[idx]:
-                    lm = landmarks.landmark[idx]
-                    x, y = int(lm.x * w), int(lm.y * h)
-                    cv2.circle(annotated, (x, y), 5, colors.get(idx, (0, 255, 0)), -1)
-        
-        annotated_frames.append(annotated)
-    return annotated_frames
+    return list(iter_annotated_frames(frames, landmarks_list, landmark_indices, per_frame_status))
@@ -6,10 +6,18 @@ Extracts frames from uploaded video for processing
 import tempfile
 import os
 import re
+import shutil
 import uuid
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 import cv2
 
+# Set VIDEO_HW_ACCELERATION=1 to ask OpenCV's FFmpeg backend for hardware decode/encode
+# (NVDEC/NVENC, VA-API, ...). OpenCV falls back to software codecs when none is available.
+VIDEO_HW_ACCELERATION = os.environ.get("VIDEO_HW_ACCELERATION", "0") == "1"
+_HW_CAPTURE_PARAMS = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+_HW_WRITER_PARAMS = [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -66,6 +74,7 @@ def accept_video_file(file: UploadFile) -> dict:
 async def save_video_temp(file: UploadFile) -> str:
     """
     Saves uploaded video file to temporary location using streaming.
+    The copy runs in one worker thread in 1 MiB chunks, keeping memory flat and the event loop free.
     Uses sanitized filename to prevent path traversal attacks.
     Returns path to temporary file
     """
@@ -87,14 +96,10 @@ async def save_video_temp(file: UploadFile) -> str:
     # Use NamedTemporaryFile which automatically handles secure temp directory
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
     
-    chunk_size = 1024 * 1024
-    while True:
-        chunk = await file.read(chunk_size)
-        if not chunk:
-            break
-        temp_file.write(chunk)
-    
-    temp_file.close()
+    try:
+        await run_in_threadpool(shutil.copyfileobj, file.file, temp_file, 1024 * 1024)
+    finally:
+        temp_file.close()
     return temp_file.name
 
 
@@ -103,26 +108,17 @@ def process_frames_from_source(source, validate: bool = True) -> tuple:
     General frame processor - accepts video path (str) or frame list.
     Returns tuple of (frames list, fps, frame_validation, fps_validation).
     Usable by both upload (file path) and livestream (frame list).
+    Materializes every frame; prefer iter_video_frames when frames can be consumed one at a time.
     """
     if isinstance(source, str):
-        # File path - extract frames
-        cap = cv2.VideoCapture(source)
-        if not cap.isOpened():
-            if validate:
-                from src.shared.upload_video.video_validation import validate_extracted_frames, detect_fps_from_video
-                frame_validation = validate_extracted_frames([])
-                fps, fps_validation = detect_fps_from_video(source, 0)
-                return [], fps, frame_validation, fps_validation
-            return [], 30.0, None, None
+        # File path - collect frames from the streaming decoder (an unopenable file yields none)
         frames = []
+        frame_iter = iter_video_frames(source)
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            for frame in frame_iter:
                 frames.append(frame)
         except Exception as e:
-            cap.release()
+            frame_iter.close()
             if validate:
                 from src.shared.upload_video.video_validation import validate_extracted_frames, detect_fps_from_video
                 frame_validation = validate_extracted_frames(frames)
@@ -133,7 +129,6 @@ def process_frames_from_source(source, validate: bool = True) -> tuple:
                 fps, fps_validation = detect_fps_from_video(source, len(frames))
                 return frames, fps, frame_validation, fps_validation
             return frames, 30.0, None, None
-        cap.release()
         video_path = source
     elif isinstance(source, list):
         # Frame list - use directly
@@ -159,34 +154,90 @@ def process_frames_from_source(source, validate: bool = True) -> tuple:
     return frames, fps, None, None
 
 
+def open_video_capture(video_path: str):
+    """Opens a cv2.VideoCapture, requesting hardware decode when VIDEO_HW_ACCELERATION is set."""
+    if VIDEO_HW_ACCELERATION:
+        return cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, _HW_CAPTURE_PARAMS)
+    return cv2.VideoCapture(video_path)
+
+
+def iter_video_frames(video_path: str, reuse_buffer: bool = False):
+    """
+    Yields decoded frames from a video file one at a time.
+    Only the current frame is held in memory; the capture is released when iteration ends.
+    With reuse_buffer=True every frame is decoded into the same array, so each yielded
+    frame is only valid until the next one is requested.
+    """
+    cap = open_video_capture(video_path)
+    frame = None
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read(frame if reuse_buffer else None)
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def retain_frames(frames, cache: dict):
+    """
+    Yields frames unchanged while keeping copies in cache["frames"], up to cache["max_bytes"].
+    If the budget is exceeded the copies are dropped and cache["frames"] is set to None,
+    so callers fall back to decoding the video again.
+    """
+    retained, used_bytes = [], 0
+    cache["frames"] = retained
+    for frame in frames:
+        if retained is not None:
+            used_bytes += frame.nbytes
+            if used_bytes > cache.get("max_bytes", 0):
+                retained = cache["frames"] = None
+            else:
+                retained.append(frame.copy())
+        yield frame
+
+
 def extract_frames(video_path: str, validate: bool = True) -> tuple:
     """
     Upload-specific wrapper - extracts frames from video file path.
     Returns tuple of (frames list, fps, frame_validation, fps_validation).
-    Maintains backward compatibility.
+    Maintains backward compatibility; new code should stream with iter_video_frames instead.
     """
     return process_frames_from_source(video_path, validate)
 
 
-def save_frames_as_video(frames: list, output_path: str, fps: float = 30.0) -> str:
+def open_video_writer(output_path: str, fps: float, frame_size: tuple):
+    """
+    Opens a cv2.VideoWriter for (width, height) frames, preferring H.264 (avc1)
+    and falling back to mp4v when the H.264 encoder is unavailable.
+    Requests hardware encode when VIDEO_HW_ACCELERATION is set.
+    """
+    params = _HW_WRITER_PARAMS if VIDEO_HW_ACCELERATION else []
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'avc1'), fps, frame_size, params)
+    if not out.isOpened():
+        out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size, params)
+    return out
+
+
+def save_frames_as_video(frames, output_path: str, fps: float = 30.0) -> str:
     """
     Saves frames as video file using OpenCV
+    Accepts a list or any iterable of frames, writing each as it arrives.
     Returns path to saved video
     """
-    if not frames:
+    frames = iter(frames)
+    first_frame = next(frames, None)
+    if first_frame is None:
         raise ValueError("No frames to save")
     
-    h, w, _ = frames[0].shape
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (w, h))
-    
-    if not out.isOpened():
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (w, h))
-    
-    for frame in frames:
-        out.write(frame)
+    h, w, _ = first_frame.shape
+    out = open_video_writer(output_path, fps, (w, h))
     
-    out.release()
+    try:
+        out.write(first_frame)
+        for frame in frames:
+            out.write(frame)
+    finally:
+        out.release()
     return output_path
-
@@ -6,48 +6,105 @@ Validates video format, codec, and quality
 import cv2
 import numpy as np
 import os
+import struct
+from types import MappingProxyType
+from src.shared.upload_video.upload_video import open_video_capture
+
+
+_VIDEO_MAGIC_NUMBERS = MappingProxyType({
+    'mp4': (
+        b'\x00\x00\x00\x20ftyp',  # MP4 (ISO Base Media)
+        b'\x00\x00\x00\x18ftyp',  # MP4 variant
+        b'\x00\x00\x00\x1Cftyp',  # MP4 variant
+        b'\x00\x00\x00\x1Cftypisom',  # MP4 (ISO Media)
+        b'\x00\x00\x00\x1Cftypmp41',  # MP4 (MPEG-4 v1)
+        b'\x00\x00\x00\x1Cftypmp42',  # MP4 (MPEG-4 v2)
+        b'\x00\x00\x00\x1Cftypavc1',  # MP4 (AVC)
+        b'\x00\x00\x00\x1Cftypiso2',  # MP4 (ISO 20022)
+    ),
+    'mov': (
+        b'\x00\x00\x00\x20ftypqt  ',  # QuickTime
+        b'\x00\x00\x00\x14ftypqt  ',  # QuickTime variant
+        b'\x00\x00\x00\x18ftypqt  ',  # QuickTime variant
+        b'\x00\x00\x00\x1Cftypqt  ',  # QuickTime variant
+    ),
+    'avi': (
+        b'RIFF',  # AVI (starts with RIFF, then has AVI at offset 8)
+    ),
+    'webm': (
+        b'\x1A\x45\xDF\xA3',  # WebM (EBML header)
+    ),
+    'mkv': (
+        b'\x1A\x45\xDF\xA3',  # Matroska (same as WebM)
+    ),
+    'flv': (
+        b'FLV',  # Flash Video
+    ),
+    '3gp': (
+        b'\x00\x00\x00\x20ftyp3g2a',  # 3GP
+        b'\x00\x00\x00\x20ftyp3gp4',  # 3GP variant
+        b'\x00\x00\x00\x20ftyp3gp5',  # 3GP variant
+    ),
+})
 
 
 def get_video_magic_numbers() -> dict:
     """
-    Returns dictionary of video file magic numbers (file signatures).
-    Key: format name, Value: list of byte signatures (as bytes or hex strings)
+    Returns mapping of video file magic numbers (file signatures).
+    Key: format name, Value: tuple of byte signatures.
+    The mapping is a shared read-only module constant, so no dict is rebuilt per call.
     """
-    return {
-        'mp4': [
-            b'\x00\x00\x00\x20ftyp',  # MP4 (ISO Base Media)
-            b'\x00\x00\x00\x18ftyp',  # MP4 variant
-            b'\x00\x00\x00\x1Cftyp',  # MP4 variant
-            b'\x00\x00\x00\x1Cftypisom',  # MP4 (ISO Media)
-            b'\x00\x00\x00\x1Cftypmp41',  # MP4 (MPEG-4 v1)
-            b'\x00\x00\x00\x1Cftypmp42',  # MP4 (MPEG-4 v2)
-            b'\x00\x00\x00\x1Cftypavc1',  # MP4 (AVC)
-            b'\x00\x00\x00\x1Cftypiso2',  # MP4 (ISO 20022)
-        ],
-        'mov': [
-            b'\x00\x00\x00\x20ftypqt  ',  # QuickTime
-            b'\x00\x00\x00\x14ftypqt  ',  # QuickTime variant
-            b'\x00\x00\x00\x18ftypqt  ',  # QuickTime variant
-            b'\x00\x00\x00\x1Cftypqt  ',  # QuickTime variant
-        ],
-        'avi': [
-            b'RIFF',  # AVI (starts with RIFF, then has AVI at offset 8)
-        ],
-        'webm': [
-            b'\x1A\x45\xDF\xA3',  # WebM (EBML header)
-        ],
-        'mkv': [
-            b'\x1A\x45\xDF\xA3',  # Matroska (same as WebM)
-        ],
-        'flv': [
-            b'FLV',  # Flash Video
-        ],
-        '3gp': [
-            b'\x00\x00\x00\x20ftyp3g2a',  # 3GP
-            b'\x00\x00\x00\x20ftyp3gp4',  # 3GP variant
-            b'\x00\x00\x00\x20ftyp3gp5',  # 3GP variant
-        ],
-    }
+    return _VIDEO_MAGIC_NUMBERS
+
+
+def _build_signature_table(magic_numbers: dict) -> tuple:
+    """
+    Indexes magic numbers as {signature: (format priority, format name)} plus, per first byte,
+    the distinct lengths of the signatures starting with it.
+    A signature listed under several formats keeps the first one, matching get_video_magic_numbers order.
+    """
+    table = {}
+    for priority, (format_name, signatures) in enumerate(magic_numbers.items()):
+        for signature in signatures:
+            table.setdefault(signature, (priority, format_name))
+    lengths_by_first_byte = {}
+    for signature in table:
+        lengths_by_first_byte.setdefault(signature[0], set()).add(len(signature))
+    return table, {first: tuple(sorted(lengths)) for first, lengths in lengths_by_first_byte.items()}
+
+
+_SIGNATURE_TABLE, _SIGNATURE_LENGTHS_BY_FIRST_BYTE = _build_signature_table(get_video_magic_numbers())
+# AVI files are RIFF containers whose form type at offset 8 is AVI or AVIX.
+_AVI_FORM_TYPES = (b'AVI ', b'AVIX')
+
+
+def _match_video_signature(header: bytes) -> str:
+    """
+    Returns the format whose signature prefixes header, or None.
+    The first byte selects which signature lengths can match, then one dict lookup per length
+    replaces a startswith scan over every signature;
+    when several formats match, the one listed first in get_video_magic_numbers wins.
+    """
+    best = None
+    for length in _SIGNATURE_LENGTHS_BY_FIRST_BYTE.get(header[0], ()):
+        match = _SIGNATURE_TABLE.get(header[:length])
+        if match is None or (match[1] == 'avi' and header[8:12] not in _AVI_FORM_TYPES):
+            continue
+        if match[0] == 0:
+            # The first listed format (mp4, the common upload) cannot be outranked, so stop looking
+            return match[1]
+        if best is None or match < best:
+            best = match
+    return best[1] if best else None
+
+
+def _read_file_header(file_path: str, size: int) -> bytes:
+    """Reads the first size bytes with one pread on a raw descriptor, skipping the buffered file object."""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        return os.pread(fd, size, 0)
+    finally:
+        os.close(fd)
 
 
 def validate_file_headers(file_path: str) -> dict:
@@ -55,17 +112,15 @@ def validate_file_headers(file_path: str) -> dict:
     Validates file headers (magic numbers) to ensure file is actually a video.
     Returns validation result with detected format and errors.
     """
-    if not os.path.exists(file_path):
+    try:
+        header = _read_file_header(file_path, 32)
+    except FileNotFoundError:
         return {
             "is_valid": False,
             "detected_format": None,
             "errors": ["File does not exist."],
             "recommendation": "File may have been deleted or path is incorrect."
         }
-    
-    try:
-        with open(file_path, 'rb') as f:
-            header = f.read(32)
     except Exception as e:
         return {
             "is_valid": False,
@@ -82,26 +137,7 @@ def validate_file_headers(file_path: str) -> dict:
             "recommendation": "File appears to be corrupted or not a valid video file."
         }
     
-    magic_numbers = get_video_magic_numbers()
-    detected_format = None
-    
-    for format_name, signatures in magic_numbers.items():
-        for signature in signatures:
-            if format_name == 'avi':
-                if header.startswith(b'RIFF') and len(header) >= 12:
-                    if header[8:12] == b'AVI ' or header[8:12] == b'AVIX':
-                        detected_format = format_name
-                        break
-            elif format_name == 'flv':
-                if header.startswith(signature):
-                    detected_format = format_name
-                    break
-            else:
-                if header.startswith(signature):
-                    detected_format = format_name
-                    break
-        if detected_format:
-            break
+    detected_format = _match_video_signature(header)
     
     if detected_format:
         return {
@@ -130,29 +166,29 @@ def get_supported_codecs() -> list:
     return ['avc1', 'h264', 'H264', 'X264', 'mp4v', 'MP4V', 'hevc', 'HEVC', 'hvc1', 'HVC1']
 
 
+_SUPPORTED_CODECS_LOWER = frozenset(codec.lower() for codec in get_supported_codecs())
+
+
 def _fourcc_to_string(fourcc_int: float) -> str:
     """Converts FOURCC integer to string representation."""
     if fourcc_int == 0 or fourcc_int is None:
         return "unknown"
-    fourcc_int = int(fourcc_int)
-    fourcc_str = "".join([chr(int((fourcc_int >> (8 * i)) & 0xFF)) for i in range(4)])
-    return fourcc_str.strip('\x00')
+    # Latin-1 maps each byte to the code point of the same value, i.e. chr() of every little-endian byte.
+    return struct.pack('<I', int(fourcc_int) & 0xFFFFFFFF).decode('latin-1').strip('\x00')
 
 
-def validate_file_content(video_path: str) -> dict:
-    """
-    Validates that the file is actually a valid, processable video file.
-    Checks that OpenCV can open it, read frames, and the file structure is valid.
-    Returns validation result with detailed information.
-    """
-    if not os.path.exists(video_path):
+def _file_size_error(video_path: str) -> dict:
+    """Returns the content validation failure for a missing, empty or sub-1KB file, or None."""
+    try:
+        file_size = os.stat(video_path).st_size
+    except OSError:
+        # Same cases os.path.exists reports as missing, found with one stat call instead of two
         return {
             "is_valid": False,
             "errors": ["File does not exist."],
             "recommendation": "File may have been deleted or path is incorrect."
         }
     
-    file_size = os.path.getsize(video_path)
     if file_size == 0:
         return {
             "is_valid": False,
@@ -167,14 +203,11 @@ def validate_file_content(video_path: str) -> dict:
             "recommendation": "File appears to be corrupted or not a valid video file."
         }
     
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {
-            "is_valid": False,
-            "errors": ["OpenCV cannot open the video file."],
-            "recommendation": "File may be corrupted or in an unsupported format. Please convert to MP4 (H.264) format."
-        }
-    
+    return None
+
+
+def _probe_file_content(cap) -> dict:
+    """Reads properties and up to 10 test frames from an opened capture and builds the content validation result."""
     # Get video properties
     fps = cap.get(cv2.CAP_PROP_FPS)
     frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -197,23 +230,18 @@ def validate_file_content(video_path: str) -> dict:
     if width > 10000 or height > 10000:
         warnings.append(f"Unusually large video dimensions: {width}x{height}. Processing may be slow.")
     
-    # Try to read at least one frame
-    frames_read = 0
+    # Try to read at least one frame; only the first is converted to pixels for the dimension check,
+    # the rest are just grabbed (demuxed and decoded without the BGR conversion and copy)
     valid_frames = 0
     test_frames = min(10, frame_count) if frame_count > 0 else 10
     
-    for i in range(test_frames):
-        ret, frame = cap.read()
-        frames_read += 1
-        if ret and frame is not None:
+    ret, frame = cap.read()
+    if ret and frame is not None:
+        valid_frames = 1
+        if frame.shape[0] != height or frame.shape[1] != width:
+            warnings.append("Frame 0 has inconsistent dimensions.")
+        while valid_frames < test_frames and cap.grab():
             valid_frames += 1
-            # Check frame validity
-            if frame.shape[0] != height or frame.shape[1] != width:
-                warnings.append(f"Frame {i} has inconsistent dimensions.")
-        else:
-            break
-    
-    cap.release()
     
     if valid_frames == 0:
         errors.append("Cannot read any frames from video. File may be corrupted or incomplete.")
@@ -247,14 +275,51 @@ def validate_file_content(video_path: str) -> dict:
     }
 
 
+def validate_video_file(video_path: str) -> tuple:
+    """
+    Runs validate_file_content and validate_video_format on a single VideoCapture, so the container is parsed once.
+    Test frames decode on the hardware decoder when VIDEO_HW_ACCELERATION is set (see open_video_capture).
+    The format check reuses the content probe's first frame read instead of decoding it again.
+    Returns (content_validation, format_validation); format_validation is None when content validation fails.
+    """
+    size_error = _file_size_error(video_path)
+    if size_error:
+        return size_error, None
+    
+    cap = open_video_capture(video_path)
+    if not cap.isOpened():
+        return {
+            "is_valid": False,
+            "errors": ["OpenCV cannot open the video file."],
+            "recommendation": "File may be corrupted or in an unsupported format. Please convert to MP4 (H.264) format."
+        }, None
+    
+    try:
+        codec = _fourcc_to_string(cap.get(cv2.CAP_PROP_FOURCC))
+        content_validation = _probe_file_content(cap)
+    finally:
+        cap.release()
+    if not content_validation["is_valid"]:
+        return content_validation, None
+    return content_validation, _format_result(codec, content_validation["valid_frames_read"] > 0)
+
+
+def validate_file_content(video_path: str) -> dict:
+    """
+    Validates that the file is actually a valid, processable video file.
+    Checks that OpenCV can open it, read frames, and the file structure is valid.
+    Returns validation result with detailed information.
+    """
+    return validate_video_file(video_path)[0]
+
+
 def validate_video_format(video_path: str) -> dict:
     """
     Validates video format and codec using whitelist approach.
     If OpenCV can open and read frames, allows the video even if codec is not whitelisted.
     Returns validation result with codec info and errors.
     """
-    supported_codecs = get_supported_codecs()
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video_capture(video_path)
     if not cap.isOpened():
         return {
             "is_valid": False,
@@ -270,8 +335,12 @@ def validate_video_format(video_path: str) -> dict:
     ret, test_frame = cap.read()
     can_read_frames = ret and test_frame is not None
     cap.release()
-    
-    is_codec_whitelisted = codec.lower() in [c.lower() for c in supported_codecs]
+    return _format_result(codec, can_read_frames)
+
+
+def _format_result(codec: str, can_read_frames: bool) -> dict:
+    """Builds the format validation result for an opened video from its codec and whether a frame could be read."""
+    is_codec_whitelisted = codec.lower() in _SUPPORTED_CODECS_LOWER
     
     if can_read_frames:
         if not is_codec_whitelisted and codec != "unknown":
@@ -337,62 +406,84 @@ def _is_corrupted_frame(frame) -> bool:
     if not _is_valid_frame_dimensions(frame):
         return True
     if len(frame.shape) == 3:
+        if frame.dtype == np.uint8 and frame.shape[2] <= 4:
+            # cv2.sumElems gives exact per-channel integer sums an order of magnitude faster than np.mean;
+            # comparing the total against size-scaled bounds is the same test as mean < 1 or mean > 254.
+            total = sum(cv2.sumElems(frame))
+            return total < frame.size or total > 254 * frame.size
         mean_val = np.mean(frame)
         if mean_val < 1.0 or mean_val > 254.0:
             return True
     return False
 
 
-def validate_extracted_frames(frames: list) -> dict:
+def summarize_frame_validation(frame_count: int, corrupted_count: int) -> dict:
     """
-    Validates extracted frames for quality and corruption.
-    Returns validation result with frame count and errors.
+    Builds frame validation result from frame and corruption counts.
+    Shared by list-based and streaming frame validation.
     """
-    if not frames:
+    if frame_count == 0:
         return {
             "is_valid": False,
             "frame_count": 0,
             "errors": ["No frames extracted from video."],
             "recommendation": "Video file may be corrupted or format not fully supported. Please try re-exporting the video."
         }
-    valid_frames = []
-    corrupted_count = 0
-    for i, frame in enumerate(frames):
-        if not _is_valid_frame_dimensions(frame):
-            corrupted_count += 1
-            continue
-        if _is_corrupted_frame(frame):
-            corrupted_count += 1
-            continue
-        valid_frames.append(frame)
-    if len(valid_frames) == 0:
+    valid_frame_count = frame_count - corrupted_count
+    if valid_frame_count == 0:
         return {
             "is_valid": False,
-            "frame_count": len(frames),
+            "frame_count": frame_count,
             "valid_frame_count": 0,
             "corrupted_count": corrupted_count,
             "errors": ["All extracted frames are invalid or corrupted."],
             "recommendation": "Video file appears corrupted. Please try a different video file or re-export the video."
         }
-    if corrupted_count > len(frames) * 0.5:
+    if corrupted_count > frame_count * 0.5:
         return {
             "is_valid": False,
-            "frame_count": len(frames),
-            "valid_frame_count": len(valid_frames),
+            "frame_count": frame_count,
+            "valid_frame_count": valid_frame_count,
             "corrupted_count": corrupted_count,
-            "errors": [f"More than 50% of frames are corrupted ({corrupted_count}/{len(frames)})."],
+            "errors": [f"More than 50% of frames are corrupted ({corrupted_count}/{frame_count})."],
             "recommendation": "Video file appears heavily corrupted. Please try a different video file."
         }
     return {
         "is_valid": True,
-        "frame_count": len(frames),
-        "valid_frame_count": len(valid_frames),
+        "frame_count": frame_count,
+        "valid_frame_count": valid_frame_count,
         "corrupted_count": corrupted_count,
         "errors": [],
         "recommendation": None
     }
 
 
+def validate_extracted_frames(frames: list) -> dict:
+    """
+    Validates extracted frames for quality and corruption.
+    Returns validation result with frame count and errors.
+    """
+    if not frames:
+        return summarize_frame_validation(0, 0)
+    corrupted_count = sum(1 for frame in frames if _is_corrupted_frame(frame))
+    return summarize_frame_validation(len(frames), corrupted_count)
+
+
+def track_frame_quality(frames, tally: dict):
+    """
+    Yields frames unchanged while counting total and corrupted frames into tally.
+    Lets streaming callers validate frames without keeping them in memory;
+    pass the tally to summarize_frame_validation once the stream is consumed.
+    """
+    tally.setdefault("frame_count", 0)
+    tally.setdefault("corrupted_count", 0)
+    for frame in frames:
+        tally["frame_count"] += 1
+        if _is_corrupted_frame(frame):
+            tally["corrupted_count"] += 1
+        yield frame
+
+
 def validate_fps(fps: float) -> dict:
     """
     Validates FPS value. Reusable for both upload and livestream modes.
@@ -455,12 +546,20 @@ def detect_fps_from_video(video_path: str, frame_count: int = None) -> tuple:
     Detects FPS from video metadata. Upload mode only.
     Returns tuple of (fps, validation_result).
     """
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video_capture(video_path)
     if not cap.isOpened():
         validation = validate_fps(None)
         return 30.0, validation
     fps_metadata = cap.get(cv2.CAP_PROP_FPS)
     cap.release()
+    return fps_from_metadata(fps_metadata)
+
+
+def fps_from_metadata(fps_metadata: float) -> tuple:
+    """
+    Picks the processing FPS from a capture's FPS metadata, defaulting to 30.0 when it is missing or invalid.
+    Lets callers that already probed the capture skip reopening it. Returns tuple of (fps, validation_result).
+    """
     if fps_metadata and fps_metadata > 0:
         fps = fps_metadata
         validation = validate_fps(fps)